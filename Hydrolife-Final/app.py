@@ -192,16 +192,14 @@ if __name__ == "__main__":
 
 import streamlit as st
 
-from login import login
-from onboarding import onboarding
-from dashboard import dashboard
-from water_log import water_log
-from progress import progress
-from games import games
-from settings import settings
-
-from database import database, get_userdata, update_water_intake
-from helpers import reset_daily
+from database import SESSION_FIELDS, database
+import assets
+import async_db
+import intake_buffer
+import page_registry
+import reminder_scheduler
+import rollover
+import user_cache
 
 # -----------------------------------------------------------
 # PAGE CONFIG
@@ -217,69 +215,9 @@ st.set_page_config(
 # LOAD GLOBAL CSS
 # -----------------------------------------------------------
 def load_css():
-    st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-
-    * {
-        font-family: 'Inter', sans-serif;
-    }
-
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-
-    .main, .stApp {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
-    }
-
-    .stButton > button {
-        border-radius: 12px !important;
-        padding: 12px 24px !important;
-        font-weight: 600 !important;
-        transition: all 0.3s ease !important;
-    }
-
-    .stTextInput > div > div > input,
-    .stNumberInput > div > div > input,
-    .stSelectbox > div > div > select {
-        border-radius: 12px !important;
-        border: 2px solid #e0e0e0 !important;
-        padding: 12px !important;
-        transition: all 0.3s ease !important;
-    }
-
-    .stTextInput > div > div > input:focus,
-    .stNumberInput > div > div > input:focus {
-        border-color: #667eea !important;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1) !important;
-    }
-
-    .nav-container {
-        position: fixed;
-        bottom: 0;
-        left: 0;
-        right: 0;
-        background: rgba(255, 255, 255, 0.95);
-        backdrop-filter: blur(20px);
-        border-top: 1px solid rgba(0, 0, 0, 0.1);
-        padding: 16px;
-        z-index: 1000;
-        box-shadow: 0 -4px 20px rgba(0, 0, 0, 0.1);
-    }
-
-    .stDeployButton {display: none;}
-
-    @keyframes pulse {
-        0%, 100% { transform: scale(1); }
-        50% { transform: scale(1.05); }
-    }
-
-    .pulse-animation {
-        animation: pulse 2s ease-in-out infinite;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # static/theme/hydrolife.css is linked by the theme component, so only
+    # the empty component frame is sent on each rerun
+    assets.theme()
 
 # -----------------------------------------------------------
 # INITIALIZE SESSION STATE
@@ -304,13 +242,11 @@ def init_session_state():
     if st.session_state.logged_in and st.session_state.id_user:
 
         if 'user_data' not in st.session_state:
-            data = get_userdata(st.session_state.id_user)
+            intake_buffer.flush(st.session_state.id_user)
+            async_db.wait_for_writes(timeout=5)
+            data = user_cache.get_user(st.session_state.id_user, SESSION_FIELDS)
 
             if data:
-                # Reset water logs if the date changed
-                data['water_data'] = reset_daily(data['water_data'])
-                update_water_intake(st.session_state.id_user, data['water_data'])
-
                 st.session_state.user_data = data['user_data']
                 st.session_state.water_data = data['water_data']
                 st.session_state.settings = data['settings']
@@ -324,13 +260,7 @@ def show_navigation():
     if not st.session_state.logged_in:
         return
 
-    pages = [
-        {'id': 'dashboard', 'icon': '🏠', 'label': 'Home'},
-        {'id': 'log', 'icon': '💧', 'label': 'Sips'},
-        {'id': 'progress', 'icon': '📊', 'label': 'Stats'},
-        {'id': 'games', 'icon': '🎮', 'label': 'Games'},
-        {'id': 'settings', 'icon': '⚙️', 'label': 'Settings'}
-    ]
+    pages = page_registry.nav_pages()
 
     st.markdown('<div class="nav-container">', unsafe_allow_html=True)
     cols = st.columns(len(pages))
@@ -358,30 +288,23 @@ def main():
     load_css()
     init_session_state()
     database()   # ensures DB file + tables exist
+    reminder_scheduler.start()   # once per process: loads every user's reminders
+    rollover.start()   # once per process: closes each user's day at their midnight
 
-    # ONBOARDING
-    if st.session_state.onboarding:
-        onboarding()
-        return
+    # Onboarding, login or the current page, depending on session state
+    page = page_registry.route(st.session_state)
 
-    # LOGIN PAGE
-    if not st.session_state.logged_in:
-        login()
+    if page in ('onboarding', 'login'):
+        page_registry.render(page)
         return
 
-    # LOGGED-IN PAGES
-    page = st.session_state.current_page
+    # Write buffered sips whenever the user moves to another page
+    if st.session_state.get('last_page') != page:
+        intake_buffer.flush(st.session_state.id_user)
+        st.session_state.last_page = page
 
-    if page == 'dashboard':
-        dashboard()
-    elif page == 'log':
-        water_log()
-    elif page == 'progress':
-        progress()
-    elif page == 'games':
-        games()
-    elif page == 'settings':
-        settings()
+    # Page modules are imported the first time they are opened
+    page_registry.render(page)
 
     # Show bottom navbar
     show_navigation()
@@ -0,0 +1,33 @@
+"""
+Static assets for HydroLife
+The global stylesheet, its font and the snake and celebration pages are
+static components in ./static, declared once per process. Streamlit serves
+them from their folder with the right content types, so a browser loads
+each one once and keeps it cached.
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+
+@lru_cache(maxsize=None)
+def version(name):
+    """Short content hash of a static file, to bust the browser cache on change"""
+    with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+@lru_cache(maxsize=None)
+def component(name):
+    """Static component for static/<name>/index.html, declared once per process"""
+    from streamlit.components.v1 import declare_component
+
+    return declare_component(f'hydrolife_{name}', path=os.path.join(STATIC_DIR, name))
+
+
+def theme():
+    """Link static/theme/hydrolife.css into the page; the browser caches it"""
+    component('theme')(version=version('theme/hydrolife.css'), key='theme', default=None)
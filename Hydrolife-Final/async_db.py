@@ -0,0 +1,91 @@
+"""
+Asyncio facade for the HydroLife database
+Runs database.py calls on dedicated DB threads and hands back awaitables
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import database
+import user_cache
+
+READ_WORKERS = int(os.environ.get("HYDROLIFE_DB_READ_WORKERS", 4))
+
+# Reads fan out over a small pool; writes go through a single thread so
+# they reach SQLite one at a time and in the order they were submitted.
+_readers = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="hydrolife-db-read")
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hydrolife-db-write")
+
+_lock = threading.Lock()
+_pending_writes = set()
+_stats = {'reads': 0, 'writes': 0, 'failed_writes': 0}
+
+log = logging.getLogger(__name__)
+
+
+def _run_read(func, *args):
+    with _lock:
+        _stats['reads'] += 1
+    return asyncio.wrap_future(_readers.submit(func, *args))
+
+
+def _run_write(func, *args):
+    return asyncio.wrap_future(write_nowait(func, *args))
+
+
+async def get_userdata(id_user):
+    return await _run_read(database.get_userdata, id_user)
+
+
+async def get_many(id_users):
+    """Load several users concurrently"""
+    return await asyncio.gather(*(get_userdata(id_user) for id_user in id_users))
+
+
+async def log_intake(id_user, ml, unit='ml'):
+    return await _run_write(database.log_intake, id_user, ml, unit)
+
+
+async def update_remainder(id_user, settings):
+    return await _run_write(user_cache.update_reminder, id_user, settings)
+
+
+async def update_water_settings(id_user, name, age, water_goal):
+    return await _run_write(user_cache.update_settings, id_user, name, age, water_goal)
+
+
+def write_nowait(func, *args):
+    """Queue a write on the writer thread without waiting; returns its Future"""
+    future = _writer.submit(func, *args)
+    with _lock:
+        _pending_writes.add(future)
+    future.add_done_callback(_write_done)
+    return future
+
+
+def _write_done(future):
+    with _lock:
+        _pending_writes.discard(future)
+        _stats['writes'] += 1
+        if future.exception() is not None:
+            _stats['failed_writes'] += 1
+    if future.exception() is not None:
+        log.error("Background database write failed", exc_info=future.exception())
+
+
+def wait_for_writes(timeout=None):
+    """Block until every queued write has finished; returns how many are still pending"""
+    with _lock:
+        pending = list(_pending_writes)
+    _, not_done = wait(pending, timeout=timeout)
+    return len(not_done)
+
+
+def db_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats['pending_writes'] = len(_pending_writes)
+    return stats
@@ -0,0 +1,711 @@
+"""
+Benchmarks for HydroLife
+Run from this folder, e.g.  python benchmark.py writes --users 16
+Each benchmark works on a throwaway database in a temp folder.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+os.chdir(tempfile.mkdtemp(prefix="hydrolife-bench-"))
+
+import database
+
+
+def fresh_db(name, profile=None, size=None):
+    """Point the database module at a brand new file in the temp folder"""
+    path = os.path.join(os.getcwd(), f"{name}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    database.configure(path, profile=profile, size=size)
+    return path
+
+
+def make_users(count):
+    ids = []
+    for i in range(count):
+        ok, id_user = database.new_user(f"user{i:06d}", "pw", f"User {i}", 25, [], 2500)
+        ids.append(id_user)
+    return ids
+
+
+def bench_writes(args):
+    """Concurrent log_intake throughput per storage profile"""
+    print(f"{args.users} simulated users x {args.writes} writes each")
+    print(f"{'profile':<8} {'writes/s':>10} {'total s':>9} {'failed':>7}")
+
+    for profile in ("legacy", "wal"):
+        fresh_db(f"writes-{profile}", profile=profile, size=args.users)
+        ids = make_users(args.users)
+        failures = []
+
+        def session(id_user):
+            for _ in range(args.writes):
+                try:
+                    database.log_intake(id_user, 250)
+                except Exception as e:
+                    failures.append(e)
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in ids]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        done = args.users * args.writes - len(failures)
+        with database.connection() as conn:
+            logged = conn.execute('SELECT COUNT(*) FROM intake_events').fetchone()[0]
+        if logged != done:
+            print(f"{profile}: {logged} intake_events rows for {done} successful writes")
+            sys.exit(1)
+        print(f"{profile:<8} {done / elapsed:>10.0f} {elapsed:>9.2f} {len(failures):>7}")
+
+
+def bench_coalesce(args):
+    """Quick-add bursts written directly vs through the intake buffer"""
+    import intake_buffer
+
+    fresh_db("coalesce", size=args.users)
+    ids = make_users(args.users)
+    taps = args.users * args.taps
+
+    start = time.perf_counter()
+    for id_user in ids:
+        for _ in range(args.taps):
+            database.log_intake(id_user, 250)
+    direct = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for id_user in ids:
+        for _ in range(args.taps):
+            intake_buffer.add(id_user, 250)
+        intake_buffer.flush(id_user)
+    buffered = time.perf_counter() - start
+
+    stats = intake_buffer.buffer_stats()
+    print(f"{args.users} users x {args.taps} quick-add taps")
+    print(f"direct:   {taps} transactions, {direct * 1000:.1f} ms")
+    print(f"buffered: {stats['flushes']} transactions, {buffered * 1000:.1f} ms, "
+          f"{stats['coalesced']} writes coalesced")
+
+
+def checkouts():
+    stats = database.pool_stats()
+    return stats['hits'] + stats['misses'] + stats['waits']
+
+
+def bench_reruns(args):
+    """Database checkouts per dashboard rerun, uncached vs user_cache"""
+    import user_cache
+
+    fresh_db("reruns")
+    id_user = make_users(1)[0]
+    database.log_intake(id_user, 500)
+
+    before = checkouts()
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        database.get_userdata(id_user)
+    uncached = time.perf_counter() - start
+    uncached_calls = checkouts() - before
+
+    before = checkouts()
+    start = time.perf_counter()
+    for _ in range(args.reruns):
+        water_data = user_cache.get_user(id_user)['water_data']
+        user_cache.set_water_data(id_user, water_data)
+    cached = time.perf_counter() - start
+    cached_calls = checkouts() - before
+
+    print(f"{args.reruns} dashboard reruns")
+    print(f"uncached: {uncached_calls} DB checkouts, {uncached * 1000:.1f} ms")
+    print(f"cached:   {cached_calls} DB checkouts, {cached * 1000:.1f} ms")
+    print(f"cache stats: {user_cache.cache_stats()}")
+
+
+def bulk_users(count):
+    """Insert ``count`` bare user rows quickly (no hashing, one transaction)"""
+    with database.connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (username, password, name) VALUES (?, '', ?)",
+            ((f"user{i:07d}", f"User {i}") for i in range(count))
+        )
+
+
+def bench_usernames(args):
+    """Login page username lookup cost vs number of users"""
+    print(f"{'users':>8} {'full list ms':>13} {'type-ahead ms':>14}")
+    for count in (1_000, 10_000, args.users):
+        fresh_db(f"usernames-{count}")
+        bulk_users(count)
+
+        start = time.perf_counter()
+        for _ in range(args.renders):
+            with database.connection() as conn:
+                [row[0] for row in conn.execute("SELECT username FROM users ORDER BY username")]
+        full = (time.perf_counter() - start) / args.renders
+
+        start = time.perf_counter()
+        for i in range(args.renders):
+            database.has_users()
+            database.search_usernames(f"user{i % 10}", limit=5)
+        typeahead = (time.perf_counter() - start) / args.renders
+
+        print(f"{count:>8} {full * 1000:>13.3f} {typeahead * 1000:>14.3f}")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def bench_logins(args):
+    """p50/p99 login latency with concurrent sessions on the verification pool"""
+    import passwords
+
+    fresh_db("logins", size=args.concurrency)
+    make_users(args.concurrency)
+    # Start from legacy SHA-256 rows so the first login also exercises rehash
+    with database.connection() as conn:
+        conn.execute("UPDATE users SET password = ?", (passwords.LegacySHA256Hasher().encode("pw"),))
+
+    latencies = []
+    lock = threading.Lock()
+
+    def session(i):
+        for _ in range(args.logins):
+            start = time.perf_counter()
+            assert database.verify_user(f"user{i:06d}", "pw")
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    hasher = passwords.get_hasher()
+    print(f"{hasher.algorithm}, {passwords.VERIFY_WORKERS} verify workers, "
+          f"{args.concurrency} concurrent sessions x {args.logins} logins")
+    print(f"p50 {percentile(latencies, 50) * 1000:.1f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:.1f} ms   "
+          f"{len(latencies) / elapsed:.1f} logins/s")
+
+
+def bench_charts(args):
+    """Server CPU and payload bytes per Stats view: matplotlib PNGs vs Vega-Lite specs"""
+    import json
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import numpy as np
+
+    import chart_cache
+    import progress
+    import stats
+    import vega_charts
+
+    def matplotlib_view(labels, series, rolling):
+        # Uncached: what every view cost before chart_cache, and every miss still does
+        return [
+            chart_cache.render_bytes(progress.bar_chart(labels, series)),
+            chart_cache.render_bytes(progress.trend_chart(labels, series, rolling)),
+            chart_cache.render_bytes(progress.goal_pie(int(series[-1]), 2500)),
+        ]
+
+    def vega_view(labels, series, rolling):
+        # Streamlit ships the spec as JSON; the browser does the drawing
+        return [
+            json.dumps(vega_charts.bar_spec(labels, series)).encode(),
+            json.dumps(vega_charts.trend_spec(labels, series, rolling)).encode(),
+            json.dumps(vega_charts.pie_spec(int(series[-1]), 2500)).encode(),
+        ]
+
+    print(f"{args.views} views per row (three charts each)")
+    print(f"{'range':>6} {'backend':<11} {'cpu ms/view':>12} {'bytes/view':>11}")
+    for days in (7, 30, 90, 365):
+        start = np.datetime64("2026-01-01")
+        series = np.random.default_rng(days).integers(0, 4000, days)
+        labels = stats.day_labels(start, days, fmt="%Y-%m-%d")
+        rolling = stats.rolling_mean(series) if days > 7 else None
+
+        for backend, view in (("matplotlib", matplotlib_view), ("vega", vega_view)):
+            view(labels, series, rolling)
+            cpu = time.process_time()
+            for _ in range(args.views):
+                payload = view(labels, series, rolling)
+            cpu = (time.process_time() - cpu) / args.views
+            size = sum(len(chart) for chart in payload)
+            print(f"{days:>6} {backend:<11} {cpu * 1000:>12.2f} {size:>11}")
+
+
+def importtime_digest(code):
+    """Run ``code`` in a fresh interpreter under -X importtime.
+
+    Returns (wall seconds, {top-level package: self import microseconds}).
+    """
+    env = dict(os.environ, PYTHONPATH=APP_DIR)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return wall, packages
+
+
+def bench_startup(args):
+    """Cold start to the login screen: lazy page registry vs importing every page"""
+    pages = "login, onboarding, dashboard, water_log, progress, games, settings"
+    scenarios = (
+        ("lazy", "import app, page_registry; page_registry.get_page('login')"),
+        ("eager", f"import app; import {pages}"),
+    )
+    heavy = ("matplotlib", "numpy", "plyer", "schedule", "pyarrow")
+
+    digests = {}
+    print(f"{'startup':<7} {'wall ms':>9} {'import ms':>10}  heavy modules loaded")
+    for label, code in scenarios:
+        runs = [importtime_digest(code) for _ in range(args.runs)]
+        runs.sort(key=lambda run: run[0])
+        wall, packages = runs[len(runs) // 2]
+        digests[label] = packages
+        loaded = [name for name in heavy if name in packages] or ["none"]
+        print(f"{label:<7} {wall * 1000:>9.1f} {sum(packages.values()) / 1000:>10.1f}  {', '.join(loaded)}")
+
+    for label, packages in digests.items():
+        print(f"\nslowest imports ({label}, self time by top-level package)")
+        for name, micros in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {micros / 1000:>8.1f} ms  {name}")
+
+
+def bench_rerun_bytes(args):
+    """Bytes sent to the browser per rerun: dashboard with the goal met, and the snake game"""
+    from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+    from streamlit.testing.v1 import AppTest
+
+    fresh_db("rerun-bytes")
+    ok, id_user = database.new_user("bytes_user", "pw", "Bytes", 30, [], 2000)
+    database.log_intake(id_user, 2500)
+
+    sent = [0]
+    enqueue = ScriptRunContext.enqueue
+
+    def counting_enqueue(ctx, msg):
+        sent[0] += msg.ByteSize()
+        return enqueue(ctx, msg)
+
+    ScriptRunContext.enqueue = counting_enqueue
+    scenarios = (
+        ("dashboard", {'current_page': 'dashboard'}),
+        ("snake", {'current_page': 'games', 'game_mode': 'snake',
+                   'snake_body': [(10, 10), (10, 9), (10, 8)], 'snake_mark': 0}),
+    )
+    try:
+        print(f"{'page':<10} {'bytes/rerun':>12}")
+        for page, state in scenarios:
+            at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=60)
+            at.session_state.logged_in = True
+            at.session_state.id_user = id_user
+            at.session_state.username = "bytes_user"
+            for key, value in state.items():
+                at.session_state[key] = value
+            at.run()
+
+            sent[0] = 0
+            for _ in range(args.reruns):
+                at.run()
+            print(f"{page:<10} {sent[0] // args.reruns:>12}")
+    finally:
+        ScriptRunContext.enqueue = enqueue
+
+
+def bench_log_bytes(args):
+    """Bytes per Log Water action sent to the browser, and distinct sound files it has to fetch"""
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+    from streamlit.testing.v1 import AppTest
+
+    fresh_db("log-bytes")
+    ok, id_user = database.new_user("log_user", "pw", "Log", 30, [], 2000)
+
+    sent = [0]
+    media_urls = set()
+    enqueue = ScriptRunContext.enqueue
+    add_media = MediaFileManager.add
+
+    def counting_enqueue(ctx, msg):
+        sent[0] += msg.ByteSize()
+        return enqueue(ctx, msg)
+
+    def counting_add(manager, path_or_data, *rest, **kwargs):
+        # Same bytes, same content-hashed URL: the browser fetches it once
+        url = add_media(manager, path_or_data, *rest, **kwargs)
+        media_urls.add(url)
+        return url
+
+    ScriptRunContext.enqueue = counting_enqueue
+    MediaFileManager.add = counting_add
+    try:
+        at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=60)
+        at.session_state.logged_in = True
+        at.session_state.id_user = id_user
+        at.session_state.username = "log_user"
+        at.session_state.current_page = "log"
+        at.run()
+
+        sent[0] = 0
+        for _ in range(args.logs):
+            at.session_state.current_page = "log"
+            at.run()
+            at.button[1].click().run()
+    finally:
+        ScriptRunContext.enqueue = enqueue
+        MediaFileManager.add = add_media
+
+    print(f"{args.logs} log actions")
+    print(f"messages to browser:      {sent[0] // args.logs:>8} bytes/log")
+    print(f"distinct sound URLs:      {len(media_urls):>8} for {args.logs} logs")
+
+
+def ladder_goal(age, health_conditions):
+    """calculate_goal() as it was before the lookup tables, kept as the reference"""
+    age = int(age)
+    if age < 18:
+        goal = 2000
+    elif age < 50:
+        goal = 2500
+    elif age < 65:
+        goal = 2200
+    else:
+        goal = 2000
+    if 'athletic' in health_conditions:
+        goal += 1000
+    if 'pregnant' in health_conditions:
+        goal += 700
+    if 'diabetes' in health_conditions:
+        goal += 500
+    if 'kidney' in health_conditions:
+        goal -= 500
+    return max(1500, min(goal, 5000))
+
+
+def ladder_avatar(progress):
+    for threshold, avatar in ((100, "🌕"), (75, "🌔"), (50, "🌓"), (25, "🌒")):
+        if progress >= threshold:
+            return avatar
+    return "🌑"
+
+
+def ladder_level(intake):
+    for threshold, level in ((4000, 8), (3500, 7), (3000, 6), (2500, 5), (2000, 4), (1500, 3), (1000, 2)):
+        if intake >= threshold:
+            return level
+    return 1
+
+
+def bench_helpers(args):
+    """Check table/batch helpers against the old if/elif ladders, then time them over many users"""
+    import numpy as np
+
+    import helpers
+
+    rng = np.random.default_rng(args.seed)
+    n = args.users
+
+    def with_edges(values, thresholds, extra):
+        # Every threshold, its neighbours and the awkward values are always covered
+        edges = [t + d for t in thresholds for d in (-1, -0.5, 0, 0.5, 1)] + extra
+        values = values.astype(np.float64)
+        values[:len(edges)] = edges
+        return values
+
+    intakes = with_edges(rng.integers(-500, 6000, n), helpers.LEVEL_THRESHOLDS,
+                         [0, -1, np.inf, -np.inf, np.nan])
+    intakes[len(intakes) // 2:] = np.round(intakes[len(intakes) // 2:])
+    progresses = with_edges(rng.uniform(-10, 160, n), helpers.AVATAR_THRESHOLDS,
+                            [0, np.inf, -np.inf, np.nan])
+    ages = rng.integers(0, 120, n)
+    ages[:len(helpers.AGE_THRESHOLDS) * 3] = [t + d for t in helpers.AGE_THRESHOLDS for d in (-1, 0, 1)]
+    condition_sets = [
+        [c for c, keep in zip(helpers.CONDITIONS, row) if keep]
+        for row in rng.random((n, len(helpers.CONDITIONS))) < 0.3
+    ]
+
+    start = time.perf_counter()
+    levels = [helpers.get_level(x) for x in intakes.tolist()]
+    avatars = [helpers.get_avatar(x) for x in progresses.tolist()]
+    goals = [helpers.calculate_goal(a, c) for a, c in zip(ages.tolist(), condition_sets)]
+    scalar = time.perf_counter() - start
+
+    matrix = helpers.conditions_matrix(condition_sets)
+    start = time.perf_counter()
+    level_batch = helpers.get_level_batch(intakes)
+    avatar_batch = helpers.get_avatar_batch(progresses)
+    goal_batch = helpers.calculate_goal_batch(ages, matrix)
+    batch = time.perf_counter() - start
+
+    mismatches = 0
+    for name, ladder, inputs, table, vectorized in (
+        ("get_level", ladder_level, intakes.tolist(), levels, level_batch.tolist()),
+        ("get_avatar", ladder_avatar, progresses.tolist(), avatars, avatar_batch.tolist()),
+        ("calculate_goal", None, None, goals, goal_batch.tolist()),
+    ):
+        if ladder is not None:
+            expected = [ladder(x) for x in inputs]
+        else:
+            expected = [ladder_goal(a, c) for a, c in zip(ages.tolist(), condition_sets)]
+        bad = sum(1 for e, t, v in zip(expected, table, vectorized) if not (e == t == v and type(e) is type(t)))
+        mismatches += bad
+        print(f"{name:<15} {bad} mismatches out of {n}")
+
+    print(f"\nscalar loop: {scalar:.2f} s   batch: {batch * 1000:.1f} ms   ({scalar / batch:.0f}x)")
+    if mismatches:
+        sys.exit(1)
+
+
+def run_length(history, day, goal):
+    """Consecutive days up to ``day`` whose history meets the goal"""
+    run = 0
+    while history.get(str(day), 0) >= goal:
+        run += 1
+        day -= timedelta(days=1)
+    return run
+
+
+def seed_gaps(ids, today, rng):
+    """Give the i-th user a random 15-day history ending i + 1 days before
+    ``today``, and mark that last day as their last rollover.
+    Returns {id_user: {day: ml}}."""
+    noon = datetime.min.time().replace(hour=12)
+    histories, events, marks = {}, [], []
+    for gap, id_user in enumerate(ids, 1):
+        last = today - timedelta(days=gap)
+        history = {str(last - timedelta(days=i)): rng.choice((0, 1500, 2500)) for i in range(15)}
+        events += [(id_user, datetime.combine(date.fromisoformat(day), noon), ml, 'ml')
+                   for day, ml in history.items() if ml]
+        marks.append((str(last), id_user))
+        histories[id_user] = history
+
+    with database.connection() as conn:
+        conn.execute('DELETE FROM intake_events')
+        conn.execute('DELETE FROM daily_totals')
+    database.log_intakes(events)
+    with database.connection() as conn:
+        conn.executemany('UPDATE water_data SET yesterday = ? WHERE id_user = ?', marks)
+    return histories
+
+
+def bench_rollover(args):
+    """Check the rollover job and load_user for every gap up to --max-gap, then time
+    the stored streak against walking daily_totals"""
+    import random
+
+    import week_ring
+
+    rng = random.Random(args.seed)
+    goal = 2500
+    mismatches = 0
+
+    # One user per gap, for every weekday the gap can end on. Before the
+    # rollover (streak walked) and after it (streak stored), load_user's
+    # intake, streak and week must match a reference rebuilt from the full
+    # dated history. A late sip for a closed day must not leave a stale streak.
+    fresh_db("rollover")
+    ids = make_users(args.max_gap)
+    for offset in range(7):
+        today = date(2024, 1, 1) + timedelta(days=args.max_gap + offset)
+        histories = seed_gaps(ids, today, rng)
+
+        def check():
+            bad = 0
+            for id_user in ids:
+                history = histories[id_user]
+                week = week_ring.WeekRing.for_day(today)
+                for day, ml in history.items():
+                    week.set(date.fromisoformat(day), ml)
+                expected = (0, run_length(history, today - timedelta(days=1), goal), week)
+                record = database.load_user(id_user, database.DAY_FIELDS, today=today)
+                bad += (record['water_intake'], record['streak'], record['weekly_hist']) != expected
+            return bad
+
+        mismatches += check()
+        _, rolled = database.roll_over_users(None, today, limit=len(ids))
+        _, rerolled = database.roll_over_users(None, today, limit=len(ids))
+        mismatches += (rolled != len(ids)) + (rerolled != 0) + check()
+
+        # Yesterday's sips arrive after the rollover: the first user reaches the goal
+        closed = today - timedelta(days=1)
+        late = goal - histories[ids[0]].get(str(closed), 0)
+        database.log_intakes([(ids[0], datetime.combine(closed, datetime.min.time()), late, 'ml')])
+        histories[ids[0]][str(closed)] = goal
+        mismatches += check()
+    print(f"roll_over_users + load_user: {mismatches} mismatches over gaps 1-{args.max_gap} x 7 weekdays")
+
+    # Timing: 100 users who have all met the goal for the last `run` days
+    print(f"\n{'streak':>6} {'rollover ms/100 users':>22} {'walk ms/100 users':>18} {'stored ms/100 users':>20}")
+    fresh_db("rollover-timing")
+    ids = make_users(100)
+    today = date.today()
+    noon = datetime.min.time().replace(hour=12)
+    for run in (1, 7, 30, 100, 365, args.max_gap):
+        with database.connection() as conn:
+            conn.execute('DELETE FROM intake_events')
+            conn.execute('DELETE FROM daily_totals')
+            conn.execute('UPDATE water_data SET yesterday = NULL')
+        database.log_intakes([(id_user, datetime.combine(today - timedelta(days=i), noon), goal, 'ml')
+                              for id_user in ids for i in range(1, run + 1)])
+
+        def load_all():
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for id_user in ids:
+                    database.load_user(id_user, ['streak'], today=today)
+            return (time.perf_counter() - start) / args.repeat * 1000
+
+        walk = load_all()
+        start = time.perf_counter()
+        database.roll_over_users(None, today, limit=len(ids))
+        batch = (time.perf_counter() - start) * 1000
+        stored = load_all()
+        print(f"{run:>6} {batch:>22.1f} {walk:>18.1f} {stored:>20.1f}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+def legacy_set_today(weekly_hist, day, water):
+    """The old weekly_hist update: scan the list for the weekday name"""
+    name = day.strftime('%a')
+    for bucket in weekly_hist:
+        if bucket['day'] == name:
+            bucket['water'] = water
+
+
+def bench_week_ring(args):
+    """weekly_hist as a legacy list of weekday buckets vs WeekRing: agreement and update cost"""
+    import random
+
+    import week_ring
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+
+    # Filling a week day by day must give the same Mon-Sun totals either way
+    for _ in range(args.checks):
+        day = date(2024, 1, 1) + timedelta(days=rng.randrange(3650))
+        ring = week_ring.WeekRing.for_day(day)
+        legacy = [{'day': name, 'water': 0} for name in week_ring.WEEKDAYS]
+        for i in range(day.weekday() + 1):
+            water = rng.randrange(5000)
+            ring.set(ring.monday + timedelta(days=i), water)
+            legacy_set_today(legacy, ring.monday + timedelta(days=i), water)
+        mismatches += ring.slots.tolist() != [bucket['water'] for bucket in legacy]
+    print(f"weekly totals: {mismatches} mismatches over {args.checks} weeks")
+
+    today = date.today()
+    ring = week_ring.WeekRing.for_day(today)
+    legacy = [{'day': name, 'water': 0} for name in week_ring.WEEKDAYS]
+
+    start = time.perf_counter()
+    for i in range(args.updates):
+        legacy_set_today(legacy, today, i)
+    scan = (time.perf_counter() - start) / args.updates
+    start = time.perf_counter()
+    for i in range(args.updates):
+        ring.set(today, i)
+    indexed = (time.perf_counter() - start) / args.updates
+    print(f"update today: scan {scan * 1e9:.0f} ns, ring {indexed * 1e9:.0f} ns")
+
+    if mismatches:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HydroLife benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    writes = sub.add_parser("writes", help=bench_writes.__doc__)
+    writes.add_argument("--users", type=int, default=16)
+    writes.add_argument("--writes", type=int, default=200)
+    writes.set_defaults(func=bench_writes)
+
+    coalesce = sub.add_parser("coalesce", help=bench_coalesce.__doc__)
+    coalesce.add_argument("--users", type=int, default=50)
+    coalesce.add_argument("--taps", type=int, default=5)
+    coalesce.set_defaults(func=bench_coalesce)
+
+    reruns = sub.add_parser("reruns", help=bench_reruns.__doc__)
+    reruns.add_argument("--reruns", type=int, default=1000)
+    reruns.set_defaults(func=bench_reruns)
+
+    usernames = sub.add_parser("usernames", help=bench_usernames.__doc__)
+    usernames.add_argument("--users", type=int, default=100_000)
+    usernames.add_argument("--renders", type=int, default=50)
+    usernames.set_defaults(func=bench_usernames)
+
+    logins = sub.add_parser("logins", help=bench_logins.__doc__)
+    logins.add_argument("--concurrency", type=int, default=16)
+    logins.add_argument("--logins", type=int, default=5)
+    logins.set_defaults(func=bench_logins)
+
+    charts = sub.add_parser("charts", help=bench_charts.__doc__)
+    charts.add_argument("--views", type=int, default=20)
+    charts.set_defaults(func=bench_charts)
+
+    startup = sub.add_parser("startup", help=bench_startup.__doc__)
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--top", type=int, default=10)
+    startup.set_defaults(func=bench_startup)
+
+    rerun_bytes = sub.add_parser("rerun-bytes", help=bench_rerun_bytes.__doc__)
+    rerun_bytes.add_argument("--reruns", type=int, default=5)
+    rerun_bytes.set_defaults(func=bench_rerun_bytes)
+
+    log_bytes = sub.add_parser("log-bytes", help=bench_log_bytes.__doc__)
+    log_bytes.add_argument("--logs", type=int, default=5)
+    log_bytes.set_defaults(func=bench_log_bytes)
+
+    helpers_cmd = sub.add_parser("helpers", help=bench_helpers.__doc__)
+    helpers_cmd.add_argument("--users", type=int, default=1_000_000)
+    helpers_cmd.add_argument("--seed", type=int, default=0)
+    helpers_cmd.set_defaults(func=bench_helpers)
+
+    rollover_cmd = sub.add_parser("rollover", help=bench_rollover.__doc__)
+    rollover_cmd.add_argument("--max-gap", type=int, default=400)
+    rollover_cmd.add_argument("--repeat", type=int, default=10)
+    rollover_cmd.add_argument("--seed", type=int, default=0)
+    rollover_cmd.set_defaults(func=bench_rollover)
+
+    ring_cmd = sub.add_parser("week-ring", help=bench_week_ring.__doc__)
+    ring_cmd.add_argument("--checks", type=int, default=10_000)
+    ring_cmd.add_argument("--updates", type=int, default=1_000_000)
+    ring_cmd.add_argument("--seed", type=int, default=0)
+    ring_cmd.set_defaults(func=bench_week_ring)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
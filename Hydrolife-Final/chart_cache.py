@@ -0,0 +1,87 @@
+"""
+Chart render cache for HydroLife
+Keeps rendered chart images in memory so unchanged charts aren't redrawn
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_BYTES = int(os.environ.get("HYDROLIFE_CHART_CACHE_BYTES", 16 * 1024 * 1024))
+IMAGE_FORMAT = "png"
+DPI = 100
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_size = 0
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def chart_key(kind, *inputs):
+    """Hash of the chart type and everything that is drawn"""
+    digest = hashlib.blake2b(kind.encode(), digest_size=16)
+    for value in inputs:
+        if isinstance(value, np.ndarray):
+            digest.update(value.dtype.str.encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def render_bytes(fig, fmt=IMAGE_FORMAT):
+    """Rasterize (or serialize, for svg) a figure and close it"""
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=DPI, facecolor=fig.get_facecolor())
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def get_chart(kind, render, *inputs):
+    """Image bytes for a chart, calling ``render(*inputs)`` -> Figure only on a miss"""
+    global _size
+    key = chart_key(kind, *inputs)
+    with _lock:
+        image = _entries.get(key)
+        if image is not None:
+            _entries.move_to_end(key)
+            _stats['hits'] += 1
+            return image
+        _stats['misses'] += 1
+
+    image = render_bytes(render(*inputs))
+    if len(image) > MAX_BYTES:
+        return image
+
+    with _lock:
+        if key not in _entries:
+            _entries[key] = image
+            _size += len(image)
+        while _size > MAX_BYTES:
+            _, evicted = _entries.popitem(last=False)
+            _size -= len(evicted)
+            _stats['evictions'] += 1
+    return image
+
+
+def clear():
+    global _size
+    with _lock:
+        _entries.clear()
+        _size = 0
+
+
+def cache_stats():
+    """Counters: hits, misses, evictions, cached charts and bytes held"""
+    with _lock:
+        stats = dict(_stats)
+        stats['charts'] = len(_entries)
+        stats['bytes'] = _size
+    return stats
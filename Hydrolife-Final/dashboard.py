@@ -1,12 +1,37 @@
 import streamlit as st
-from datetime import datetime
-from database import update_water_intake, get_userdata
-from helpers import get_avatar, get_level, reset_daily
+
+import assets
+import async_db
+import intake_buffer
+import user_cache
+from database import DAY_FIELDS, local_today
+from helpers import get_avatar, get_level
+
+
+# Shown on the dashboard but left out of the login snapshot
+DASHBOARD_FIELDS = ['streak', 'whole_sips']
+
+
+def load_dashboard_fields():
+    """Fetch the dashboard's extra fields once, and the day's fields again when
+    a session left open past midnight picks up the rollover job's new day"""
+    water_data = st.session_state.water_data
+    fields = [field for field in DASHBOARD_FIELDS if field not in water_data]
+    if water_data['yesterday'] != str(local_today(st.session_state.user_data['timezone'])):
+        fields += [field for field in DAY_FIELDS if field not in fields]
+    if not fields:
+        return
+    # Totals read back from the database must include sips still buffered
+    intake_buffer.flush(st.session_state.id_user)
+    async_db.wait_for_writes(timeout=5)
+    data = user_cache.get_user(st.session_state.id_user, fields)
+    if data:
+        water_data.update({field: data['water_data'][field] for field in fields})
+        water_data['yesterday'] = data['water_data']['yesterday']
 
 
 def dashboard():
-    st.session_state.water_data = reset_daily(st.session_state.water_data)
-    update_water_intake(st.session_state.id_user, st.session_state.water_data)
+    load_dashboard_fields()
     
     
     st.markdown(f"""
@@ -112,193 +137,12 @@ def dashboard():
             motivation = "You've reached your goal today! Amazing! 🎉"
             emoji = "🏆"
 
-            st.markdown("""
-            <style>
-                @keyframes firework {
-                    0% { transform: translate(0, 0); opacity: 1; }
-                    100% { transform: translate(var(--x), var(--y)); opacity: 0; }
-                }
-                
-                @keyframes trophy-bounce {
-                    0%, 100% { transform: translateY(0) scale(1); }
-                    25% { transform: translateY(-30px) scale(1.2); }
-                    50% { transform: translateY(0) scale(1.1); }
-                    75% { transform: translateY(-15px) scale(1.15); }
-                }
-                
-                @keyframes wave-pulse {
-                    0%, 100% { transform: scale(1); opacity: 0.8; }
-                    50% { transform: scale(1.5); opacity: 0; }
-                }
-                
-                @keyframes sparkle {
-                    0%, 100% { transform: scale(0) rotate(0deg); opacity: 0; }
-                    50% { transform: scale(1) rotate(180deg); opacity: 1; }
-                }
-                
-                .celebration-container {
-                    position: fixed;
-                    top: 0;
-                    left: 0;
-                    width: 100vw;
-                    height: 100vh;
-                    pointer-events: none;
-                    z-index: 9999;
-                    overflow: hidden;
-                }
-                
-                .trophy-celebration {
-                    position: fixed;
-                    top: 50%;
-                    left: 50%;
-                    transform: translate(-50%, -50%);
-                    font-size: 120px;
-                    animation: trophy-bounce 1s ease-in-out 3;
-                    filter: drop-shadow(0 0 30px rgba(255, 215, 0, 0.8));
-                }
-                
-                .success-text {
-                    position: fixed;
-                    top: 40%;
-                    left: 50%;
-                    transform: translate(-50%, -50%);
-                    font-size: 48px;
-                    font-weight: bold;
-                    color: #FFD700;
-                    text-shadow: 0 0 20px rgba(255, 215, 0, 0.8),
-                                 0 0 40px rgba(255, 215, 0, 0.6),
-                                 0 0 60px rgba(255, 215, 0, 0.4);
-                    animation: trophy-bounce 1s ease-in-out 3;
-                }
-            </style>
-            
-            <div class="celebration-container" id="celebration">
-                <div class="success-text">🎊 GOAL ACHIEVED! 🎊</div>
-                <div class="trophy-celebration">🏆</div>
-            </div>
-            
-            <script src="https://cdn.jsdelivr.net/npm/canvas-confetti@1.6.0/dist/confetti.browser.min.js"></script>
-            <script>
-                // Multi-stage confetti celebration
-                const duration = 5000;
-                const animationEnd = Date.now() + duration;
-                const defaults = { startVelocity: 30, spread: 360, ticks: 60, zIndex: 10000 };
-
-                function randomInRange(min, max) {
-                    return Math.random() * (max - min) + min;
-                }
-
-                // Stage 1: Initial burst
-                confetti({
-                    ...defaults,
-                    particleCount: 200,
-                    origin: { x: 0.5, y: 0.5 },
-                    colors: ['#FFD700', '#FFA500', '#FF69B4', '#00CED1', '#9370DB', '#32CD32']
-                });
-
-                // Stage 2: Side bursts
-                setTimeout(() => {
-                    confetti({
-                        ...defaults,
-                        particleCount: 100,
-                        origin: { x: 0, y: 0.6 },
-                        colors: ['#00BFFF', '#1E90FF', '#87CEFA']
-                    });
-                    confetti({
-                        ...defaults,
-                        particleCount: 100,
-                        origin: { x: 1, y: 0.6 },
-                        colors: ['#FFD700', '#FFA500', '#FF6347']
-                    });
-                }, 400);
-
-                // Stage 3: Emoji rain
-                setTimeout(() => {
-                    confetti({
-                        particleCount: 50,
-                        angle: 60,
-                        spread: 55,
-                        origin: { x: 0, y: 0.6 },
-                        shapes: ['circle'],
-                        colors: ['#FFD700', '#FFA500', '#FF69B4']
-                    });
-                    confetti({
-                        particleCount: 50,
-                        angle: 120,
-                        spread: 55,
-                        origin: { x: 1, y: 0.6 },
-                        shapes: ['circle'],
-                        colors: ['#00CED1', '#9370DB', '#32CD32']
-                    });
-                }, 800);
-
-                // Stage 4: Continuous rain
-                const interval = setInterval(function() {
-                    const timeLeft = animationEnd - Date.now();
-
-                    if (timeLeft <= 0) {
-                        clearInterval(interval);
-                        document.getElementById('celebration').style.display = 'none';
-                        return;
-                    }
-
-                    const particleCount = 50 * (timeLeft / duration);
-                    
-                    confetti({
-                        ...defaults,
-                        particleCount: particleCount,
-                        origin: { x: randomInRange(0.1, 0.3), y: Math.random() - 0.2 },
-                        colors: ['#00BFFF', '#1E90FF', '#87CEFA', '#ADD8E6']
-                    });
-                    
-                    confetti({
-                        ...defaults,
-                        particleCount: particleCount,
-                        origin: { x: randomInRange(0.7, 0.9), y: Math.random() - 0.2 },
-                        colors: ['#FFD700', '#FFA500', '#FF69B4', '#FF6347']
-                    });
-                }, 250);
-
-                // Stage 5: Fireworks effect
-                setTimeout(() => {
-                    for(let i = 0; i < 5; i++) {
-                        setTimeout(() => {
-                            confetti({
-                                particleCount: 150,
-                                spread: 360,
-                                origin: { 
-                                    x: randomInRange(0.2, 0.8), 
-                                    y: randomInRange(0.2, 0.6) 
-                                },
-                                colors: ['#FFD700', '#FFA500', '#FF69B4', '#00CED1', '#9370DB', '#32CD32'],
-                                startVelocity: 45,
-                                ticks: 80,
-                                gravity: 1.2,
-                                scalar: 1.2
-                            });
-                        }, i * 600);
-                    }
-                }, 1500);
-
-                // Stage 6: Stars burst
-                setTimeout(() => {
-                    confetti({
-                        particleCount: 100,
-                        spread: 160,
-                        origin: { y: 0.3 },
-                        shapes: ['star'],
-                        colors: ['#FFD700', '#FFA500', '#FFFF00'],
-                        scalar: 1.5,
-                        startVelocity: 35
-                    });
-                }, 2500);
-
-                // Remove celebration overlay after animation
-                setTimeout(() => {
-                    document.getElementById('celebration').style.display = 'none';
-                }, duration);
-            </script>
-            """, unsafe_allow_html=True)
+            # Confetti overlay is the static/celebration/ component; play it
+            # once, on the render where today's goal is first reached
+            today = str(local_today(st.session_state.user_data['timezone']))
+            if st.session_state.get('celebrated_on') != today:
+                st.session_state.celebrated_on = today
+                assets.component('celebration')(key=f'celebration-{today}')
 
         else:
             remaining = water_goal - water_intake
@@ -339,13 +183,12 @@ def add_intake(amount):
     st.session_state.water_data['whole_sips'] += 1
     
     
-    today = datetime.now().strftime('%a')
-    for day in st.session_state.water_data['weekly_hist']:
-        if day['day'] == today:
-            day['water'] = st.session_state.water_data['water_intake']
+    st.session_state.water_data['weekly_hist'].set(local_today(st.session_state.user_data['timezone']),
+                                                   st.session_state.water_data['water_intake'])
     
     
-    update_water_intake(st.session_state.id_user, st.session_state.water_data)
+    intake_buffer.add(st.session_state.id_user, amount)
+    user_cache.set_water_data(st.session_state.id_user, st.session_state.water_data)
     
     st.success(f"Added {amount}ml! 💧")
     st.rerun()
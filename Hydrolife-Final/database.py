@@ -4,22 +4,263 @@ Handles user authentication and data storage using SQLite
 """
 
 import sqlite3
-import hashlib
 import json
-from datetime import date
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import wraps
 import os
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import week_ring
+from passwords import hash_password, check_password_pooled
 
 DB_FILE = "hydrolife.db"
+POOL_SIZE = int(os.environ.get("HYDROLIFE_DB_POOL_SIZE", 8))
+
+# Pragmas applied to every new connection. "legacy" is SQLite's stock
+# rollback journal; "wal" lets readers run alongside a writer and keeps
+# commits cheap for many concurrent sessions.
+STORAGE_PROFILES = {
+    'legacy': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,
+        'busy_timeout': 5000,
+    },
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -16000,
+        'busy_timeout': 5000,
+    },
+}
+STORAGE_PROFILE = os.environ.get("HYDROLIFE_DB_PROFILE", "wal")
+
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+
+class ConnectionPool:
+    """Thread-safe pool of SQLite connections shared by every Streamlit session.
+
+    A thread checks one connection out for the duration of a ``connection()``
+    block; nested blocks on the same thread reuse it. When the block ends the
+    connection goes back to the pool so the next rerun can pick it up again
+    instead of paying another connect/close cycle.
+    """
+
+    def __init__(self, db_file, size=POOL_SIZE, profile=STORAGE_PROFILE):
+        self.db_file = db_file
+        self.size = size
+        self.profile = STORAGE_PROFILES[profile]
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open = 0
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+
+    def _connect(self):
+        profile = self.profile
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=profile['busy_timeout'] / 1000,
+            check_same_thread=False
+        )
+        conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+        conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+        conn.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout'])}")
+        return conn
+
+    def acquire(self):
+        """Take an idle connection, open a new one, or wait for one to be released"""
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._hits += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._open < self.size
+            if can_open:
+                self._open += 1
+                self._misses += 1
+            else:
+                self._waits += 1
+
+        if not can_open:
+            return self._idle.get()
+
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def release(self, conn):
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Yield a pooled connection; commit on success, roll back on error"""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        self._local.checkouts = getattr(self._local, 'checkouts', 0) + 1
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self.release(conn)
+
+    def thread_checkouts(self):
+        """Connections checked out so far by the calling thread"""
+        return getattr(self._local, 'checkouts', 0)
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown and in benchmarks)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._open -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'waits': self._waits,
+                'open': self._open,
+                'idle': self._idle.qsize(),
+            }
+
+
+_pool = ConnectionPool(DB_FILE)
+
+
+def connection():
+    """Context manager giving a pooled connection to the HydroLife database"""
+    return _pool.connection()
+
+
+def pool_stats():
+    """Return pool counters: hits, misses, waits, open and idle connections"""
+    return _pool.stats()
+
+
+def thread_checkouts():
+    """Database calls (outermost connection() blocks) made so far on this thread"""
+    return _pool.thread_checkouts()
+
+
+def configure(db_file=None, profile=None, size=None):
+    """Point the module at another database file and/or storage profile"""
+    global DB_FILE, _pool
+    _pool.close_all()
+    DB_FILE = db_file or DB_FILE
+    _migrated.discard(DB_FILE)
+    _pool = ConnectionPool(
+        DB_FILE,
+        size=size or _pool.size,
+        profile=profile or STORAGE_PROFILE
+    )
+    database()
+
+
+def is_busy_error(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def retry_on_busy(func):
+    """Retry a write with jittered exponential backoff while SQLite is busy"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(BUSY_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == BUSY_RETRIES - 1:
+                    raise
+                time.sleep(BUSY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+    return wrapper
 
-def hash_password(password):
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+
+_migrated = set()
+
+def get_schema_version(conn):
+    """Highest applied migration, or 0 for a database that predates schema_version"""
+    try:
+        cursor = conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+    except sqlite3.OperationalError:
+        return 0
+    return cursor.fetchone()[0]
 
 def database():
-    """Initialize the database with required tables"""
-    conn = sqlite3.connect(DB_FILE)
+    """Bring the database schema up to date by running pending MIGRATIONS.
+
+    The version check happens once per process and database file; after
+    that this returns immediately, so app.main() can call it every rerun.
+    """
+    if DB_FILE in _migrated:
+        return
+
+    with connection() as conn:
+        current = get_schema_version(conn)
+
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        with connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Another process may have applied it while we waited for the lock
+            if get_schema_version(conn) >= version:
+                continue
+            step(conn)
+            conn.execute('''
+                INSERT INTO schema_version (version, description)
+                VALUES (?, ?)
+            ''', (version, description))
+
+    _migrated.add(DB_FILE)
+
+def create_base_tables(conn):
+    """Migration 1: users, water_data, settings and the schema_version table"""
     cursor = conn.cursor()
 
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
     # ---------------- USERS TABLE ----------------
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -62,196 +303,675 @@ def database():
         )
     ''')
 
-    conn.commit()
-    conn.close()
+def create_intake_events(conn):
+    """Migration 2: intake_events, filled from the legacy water_data.data blobs"""
+    cursor = conn.cursor()
 
-def new_user(username, password, name, age, health_conditions, water_goal):
-    """Create a new user account"""
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
+    # ---------------- INTAKE EVENTS TABLE ----------------
+    # One append-only row per sip; daily totals, streaks and the
+    # weekly history are all derived from here.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS intake_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_user INTEGER NOT NULL,
+            logged_at TEXT NOT NULL,
+            ml INTEGER NOT NULL,
+            unit TEXT DEFAULT 'ml',
+            FOREIGN KEY (id_user) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_intake_events_user_time
+        ON intake_events (id_user, logged_at)
+    ''')
 
-        hashed_pwd = hash_password(password)
-        health_json = json.dumps(health_conditions)
+    migrate_intake_events(conn)
 
-        cursor.execute('''
-            INSERT INTO users (username, password, name, age, health_conditions, water_goal)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (username, hashed_pwd, name, age, health_json, water_goal))
-
-        id_user = cursor.lastrowid
-
-        weekly_hist = json.dumps([
-            {'day': 'Mon', 'water': 0},
-            {'day': 'Tue', 'water': 0},
-            {'day': 'Wed', 'water': 0},
-            {'day': 'Thu', 'water': 0},
-            {'day': 'Fri', 'water': 0},
-            {'day': 'Sat', 'water': 0},
-            {'day': 'Sun', 'water': 0},
-        ])
+def create_daily_totals(conn):
+    """Migration 3: daily_totals rollup, built from intake_events"""
+    cursor = conn.cursor()
 
-        cursor.execute('''
-            INSERT INTO water_data (id_user, weekly_hist, yesterday, data)
-            VALUES (?, ?, ?, ?)
-        ''', (id_user, weekly_hist, str(date.today()), '{}'))
+    # ---------------- DAILY TOTALS TABLE ----------------
+    # Rollup of intake_events kept up to date on every write, so
+    # "today", "this week" and streak reads are primary-key lookups.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            id_user INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            total_ml INTEGER NOT NULL DEFAULT 0,
+            sips INTEGER NOT NULL DEFAULT 0,
+            goal_at_time INTEGER,
+            goal_met INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_user, day),
+            FOREIGN KEY (id_user) REFERENCES users (id)
+        )
+    ''')
+
+    cursor.execute('''
+        SELECT EXISTS (SELECT 1 FROM intake_events)
+           AND NOT EXISTS (SELECT 1 FROM daily_totals)
+    ''')
+    if cursor.fetchone()[0]:
+        rebuild_daily_totals(conn=conn)
 
+def ensure_indexes(conn):
+    """Add unique id_user indexes to water_data and settings.
+
+    Safe to run at every startup: once an index exists its table is skipped.
+    Duplicate rows left by older versions are removed first, keeping the
+    oldest row per user.
+    """
+    cursor = conn.cursor()
+    for table in ('water_data', 'settings'):
+        index = f'idx_{table}_user'
         cursor.execute('''
-            INSERT INTO settings (id_user)
-            VALUES (?)
-        ''', (id_user,))
+            SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?
+        ''', (index,))
+        if cursor.fetchone():
+            continue
+
+        cursor.execute(f'''
+            DELETE FROM {table}
+            WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY id_user)
+        ''')
+        cursor.execute(f'CREATE UNIQUE INDEX {index} ON {table} (id_user)')
+
+# Names a WITH clause defines, e.g. "WITH RECURSIVE run(day, n) AS (" or "gap AS ("
+CTE_NAME = re.compile(r'(\w+)\s*(?:\([^()]*\))?\s+AS\s*(?:NOT\s+)?(?:MATERIALIZED\s+)?\(', re.IGNORECASE)
+
+def unindexed_steps(conn, sql):
+    """Return the EXPLAIN QUERY PLAN steps of ``sql`` that scan a table without an index.
+
+    Any SCAN step counts unless it uses an index or reads something that is
+    not a table: a CTE, a subquery's result or a constant row. Tables are
+    reported by alias in newer SQLite ("SCAN w"), so the name itself is not
+    checked against the schema.
+    """
+    ctes = {name.lower() for name in CTE_NAME.findall(sql)}
 
-        conn.commit()
-        conn.close()
-        return True, id_user
+    cursor = conn.cursor()
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+    problems = []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        words = detail.split()
+        if 'AUTOMATIC' in detail:
+            problems.append(detail)
+            continue
+        if words[0] != 'SCAN' or 'INDEX' in detail:
+            continue
+        # SQLite before 3.36 says "SCAN TABLE users AS u" and "SCAN SUBQUERY 1"
+        name = words[2] if words[1] == 'TABLE' and len(words) > 2 else words[1]
+        if name == 'CONSTANT' or name == 'SUBQUERY' or name.startswith('('):
+            continue
+        if name.lower() in ctes:
+            continue
+        problems.append(detail)
+    return problems
+
+def migrate_intake_events(conn):
+    """One-shot migration exploding legacy water_data.data dicts into intake_events.
+
+    Each stored day becomes a single row at noon, plus one row for the intake
+    of the last active day. Users that already have events are skipped, so
+    running it again is a no-op.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT w.id_user, w.water_intake, w.yesterday, w.data
+        FROM water_data w
+        WHERE NOT EXISTS (SELECT 1 FROM intake_events e WHERE e.id_user = w.id_user)
+    ''')
 
-    except sqlite3.IntegrityError:
-        return False, "Username already exists"
-    except Exception as e:
-        return False, str(e)
+    rows = []
+    for id_user, water_intake, yesterday, data in cursor.fetchall():
+        history = json.loads(data) if data else {}
+        if yesterday and water_intake:
+            history.setdefault(yesterday, water_intake)
+        for day, water in history.items():
+            if water:
+                rows.append((id_user, f"{day} 12:00:00", int(water), 'ml'))
+
+    cursor.executemany('''
+        INSERT INTO intake_events (id_user, logged_at, ml, unit)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+    return len(rows)
+
+def rebuild_daily_totals(id_user=None, conn=None):
+    """Recompute daily_totals from the raw intake_events history.
+
+    Historical goals are not recorded in intake_events, so rebuilt rows use
+    the user's current goal as goal_at_time.
+    """
+    if conn is None:
+        with connection() as conn:
+            return rebuild_daily_totals(id_user, conn)
+
+    where = '' if id_user is None else 'WHERE e.id_user = ?'
+    params = () if id_user is None else (id_user,)
 
-def verify_user(username, password):
-    conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
+    cursor.execute(f'DELETE FROM daily_totals {where.replace("e.", "")}', params)
+    cursor.execute(f'''
+        INSERT INTO daily_totals (id_user, day, total_ml, sips, goal_at_time, goal_met)
+        SELECT e.id_user, substr(e.logged_at, 1, 10) AS day,
+               SUM(e.ml), SUM(e.ml > 0), u.water_goal, SUM(e.ml) >= u.water_goal
+        FROM intake_events e
+        JOIN users u ON u.id = e.id_user
+        {where}
+        GROUP BY e.id_user, day
+    ''', params)
+    rebuilt = cursor.rowcount
+    # Past days may have changed, so stored streaks are recomputed
+    cursor.execute(f'UPDATE water_data SET yesterday = NULL {where.replace("e.", "")}', params)
+    return rebuilt
+
+def add_to_daily_total(cursor, id_user, day, ml, sips):
+    """Fold an intake delta into the user's daily_totals row for ``day``"""
+    cursor.execute('''
+        INSERT INTO daily_totals (id_user, day, total_ml, sips, goal_at_time, goal_met)
+        SELECT id, ?, ?, ?, water_goal, ? >= water_goal FROM users WHERE id = ?
+        ON CONFLICT (id_user, day) DO UPDATE SET
+            total_ml = total_ml + excluded.total_ml,
+            sips = sips + excluded.sips,
+            goal_at_time = excluded.goal_at_time,
+            goal_met = total_ml + excluded.total_ml >= excluded.goal_at_time
+    ''', (str(day), ml, sips, ml, id_user))
+
+def add_legacy_sips(conn):
+    """Migration 5: carry sip counters from before intake_events over.
+
+    The intake_events migration keeps one row per legacy day, so the sum of
+    daily_totals.sips undercounts what water_data.whole_sips had recorded.
+    The difference is kept as an offset that whole_sips adds back.
+    """
+    cursor = conn.cursor()
+    cursor.execute('ALTER TABLE water_data ADD COLUMN legacy_sips INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('''
+        UPDATE water_data
+        SET legacy_sips = MAX(COALESCE(whole_sips, 0) - (
+            SELECT COALESCE(SUM(sips), 0) FROM daily_totals
+            WHERE daily_totals.id_user = water_data.id_user), 0)
+    ''')
 
+def reset_stored_streaks(conn):
+    """Migration 6: water_data.streak now holds the rollover job's streak for
+    the day in water_data.yesterday. Values written by older versions were
+    counted differently, so they are dropped and recomputed on the next run."""
+    conn.execute('UPDATE water_data SET yesterday = NULL')
+
+def add_user_timezones(conn):
+    """Migration 7: users.timezone, an IANA name; NULL means the server's local time"""
+    cursor = conn.cursor()
+    cursor.execute('ALTER TABLE users ADD COLUMN timezone TEXT')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_timezone ON users (timezone, id)')
+
+# Ordered schema migrations: (version, description, step). Only append new
+# steps; an applied version is never edited or renumbered.
+MIGRATIONS = [
+    (1, 'users, water_data and settings tables', create_base_tables),
+    (2, 'intake_events table', create_intake_events),
+    (3, 'daily_totals rollup', create_daily_totals),
+    (4, 'unique id_user indexes', ensure_indexes),
+    (5, 'legacy sip counts', add_legacy_sips),
+    (6, 'streaks stored by the rollover job', reset_stored_streaks),
+    (7, 'per-user timezones', add_user_timezones),
+]
+
+def zone(timezone):
+    """ZoneInfo for an IANA name; None (the server's local time) for unset or unknown names"""
+    if not timezone:
+        return None
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def local_now(timezone=None, now=None):
+    """``now`` (default: the current time) as an aware datetime in ``timezone``"""
+    now = now or datetime.now().astimezone()
+    return now.astimezone(zone(timezone))
+
+def local_today(timezone=None, now=None):
+    """The user's calendar day; every daily_totals.day is one of these"""
+    return local_now(timezone, now).date()
+
+def user_timezone(cursor, id_user):
+    cursor.execute('SELECT timezone FROM users WHERE id = ?', (id_user,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def user_zones(cursor, id_users):
+    """{id_user: ZoneInfo or None} for ``id_users``"""
+    id_users = list(id_users)
+    zones = {}
+    for start in range(0, len(id_users), 500):
+        chunk = id_users[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'SELECT id, timezone FROM users WHERE id IN ({placeholders})', chunk)
+        zones.update((id_user, zone(timezone)) for id_user, timezone in cursor.fetchall())
+    return zones
+
+def new_user(username, password, name, age, health_conditions, water_goal, timezone=None):
+    """Create a new user account; ``timezone`` is an IANA name (None: server time)"""
+    # Hash before taking a pooled connection; the KDF is deliberately slow
     hashed_pwd = hash_password(password)
+    health_json = json.dumps(health_conditions)
+    timezone = timezone if zone(timezone) else None
 
-    cursor.execute('''
-        SELECT id FROM users WHERE username = ? AND password = ?
-    ''', (username, hashed_pwd))
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
 
-    result = cursor.fetchone()
-    conn.close()
+            cursor.execute('''
+                INSERT INTO users (username, password, name, age, health_conditions, water_goal, timezone)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (username, hashed_pwd, name, age, health_json, water_goal, timezone))
 
-    return result[0] if result else None
+            id_user = cursor.lastrowid
 
-def user_exists(username):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+            # weekly_hist is left NULL: the week is rebuilt from daily_totals
+            # on every load and only ever held in memory. A new user's stored
+            # streak (0) is valid for their first day.
+            cursor.execute('''
+                INSERT INTO water_data (id_user, yesterday, data)
+                VALUES (?, ?, ?)
+            ''', (id_user, str(local_today(timezone)), '{}'))
 
-    cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
-    result = cursor.fetchone()
-    conn.close()
+            cursor.execute('''
+                INSERT INTO settings (id_user)
+                VALUES (?)
+            ''', (id_user,))
 
-    return result is not None
+        return True, id_user
 
-def get_userdata(id_user):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    except sqlite3.IntegrityError:
+        return False, "Username already exists"
+    except Exception as e:
+        return False, str(e)
 
-    cursor.execute('''
-        SELECT name, age, health_conditions, water_goal
-        FROM users WHERE id = ?
-    ''', (id_user,))
-    userrow = cursor.fetchone()
+def verify_user(username, password):
+    """Return the user's id if the password matches, else None.
 
-    cursor.execute('''
-        SELECT water_intake, streak, whole_sips, weekly_hist, yesterday, data
-        FROM water_data WHERE id_user = ?
-    ''', (id_user,))
-    waterrow = cursor.fetchone()
+    Hashes are checked on the bounded pool in passwords.py (which may raise
+    TimeoutError under load). Legacy SHA-256 or outdated-cost hashes are
+    upgraded to the current hasher on a successful login.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, password FROM users WHERE username = ?
+        ''', (username,))
+        result = cursor.fetchone()
+
+    if not result:
+        return None
+
+    id_user, stored = result
+    matches, needs_rehash = check_password_pooled(password, stored)
+    if not matches:
+        return None
+    if needs_rehash:
+        rehash_password(id_user, stored, hash_password(password))
+    return id_user
+
+@retry_on_busy
+def rehash_password(id_user, old_hash, new_hash):
+    with connection() as conn:
+        cursor = conn.cursor()
+        # Only replace the hash we verified against, in case it changed meanwhile
+        cursor.execute('''
+            UPDATE users SET password = ? WHERE id = ? AND password = ?
+        ''', (new_hash, id_user, old_hash))
 
-    cursor.execute('''
-        SELECT notification, reminder_interval_user
-        FROM settings WHERE id_user = ?
-    ''', (id_user,))
-    settingsrow = cursor.fetchone()
-
-    conn.close()
-
-    if userrow and waterrow and settingsrow:
-        return {
-            'user_data': {
-                'name': userrow[0],
-                'age': str(userrow[1]),
-                'health_conditions': json.loads(userrow[2]),
-                'water_goal': userrow[3]
-            },
-            'water_data': {
-                'water_intake': waterrow[0],
-                'streak': waterrow[1],
-                'whole_sips': waterrow[2],
-                'weekly_hist': json.loads(waterrow[3]),
-                'yesterday': waterrow[4],
-                'data': json.loads(waterrow[5])
-            },
-            'settings': {
-                'notification': bool(settingsrow[0]),
-                'reminder_interval_user': settingsrow[1]
-            }
+def user_exists(username):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM users WHERE username = ?', (username,))
+        result = cursor.fetchone()
+
+    return result is not None
+
+# Days at goal in a row before :today, walking back through daily_totals.
+# The rollover job stores the result in water_data.streak once per day.
+STREAK_WALK = '''(
+        WITH RECURSIVE run(day, n) AS (
+            SELECT date(:today, '-1 day'), 0
+            UNION ALL
+            SELECT date(day, '-1 day'), n + 1 FROM run
+            WHERE EXISTS (
+                SELECT 1 FROM daily_totals
+                WHERE id_user = u.id AND day = run.day AND goal_met)
+        )
+        SELECT MAX(n) FROM run)'''
+
+# Fields load_user() can project. Each one is a single expression of the
+# joined users/water_data/settings query; intake figures come straight from
+# the daily_totals rollup via correlated primary-key lookups.
+USER_FIELDS = {
+    'name': 'u.name',
+    'age': 'u.age',
+    'health_conditions': 'u.health_conditions',
+    'water_goal': 'u.water_goal',
+    'timezone': 'u.timezone',
+    'notification': 's.notification',
+    'reminder_interval_user': 's.reminder_interval_user',
+    'water_intake': '''COALESCE((
+        SELECT total_ml FROM daily_totals
+        WHERE id_user = u.id AND day = :today), 0)''',
+    'whole_sips': '''w.legacy_sips + (
+        SELECT COALESCE(SUM(sips), 0) FROM daily_totals
+        WHERE id_user = u.id)''',
+    'weekly_hist': '''(
+        SELECT group_concat(day || '=' || total_ml) FROM daily_totals
+        WHERE id_user = u.id AND day >= :monday AND day <= :sunday)''',
+    'streak': f'''CASE WHEN w.yesterday = :today THEN w.streak
+        ELSE {STREAK_WALK} END''',
+}
+
+
+# Where each field sits in the session's user_data / water_data / settings
+USER_GROUPS = {
+    'user_data': ['name', 'age', 'health_conditions', 'water_goal', 'timezone'],
+    'water_data': ['water_intake', 'streak', 'whole_sips', 'weekly_hist'],
+    'settings': ['notification', 'reminder_interval_user'],
+}
+# Fields whose value changes when a day closes
+DAY_FIELDS = ['water_intake', 'streak', 'weekly_hist']
+# What a session loads at login: everything but streak and whole_sips (a
+# recursive CTE and a sum over all history), which only the dashboard shows
+SESSION_FIELDS = [
+    'name', 'age', 'health_conditions', 'water_goal', 'timezone',
+    'notification', 'reminder_interval_user', 'water_intake', 'weekly_hist',
+]
+
+class UserRecord:
+    """Lightweight row returned by load_user().
+
+    Values are kept as fetched and only decoded (JSON, weekly history, type
+    conversion) the first time a field is read.
+    """
+
+    def __init__(self, id_user, today, raw):
+        self.id_user = id_user
+        self.today = today
+        self._raw = raw
+        self._decoded = {}
+
+    def __getitem__(self, field):
+        if field not in self._decoded:
+            if field not in self._raw:
+                raise KeyError(f"{field} was not loaded; add it to fields=")
+            self._decoded[field] = self._decode(field, self._raw[field])
+        return self._decoded[field]
+
+    def __contains__(self, field):
+        return field in self._raw
+
+    def _decode(self, field, value):
+        if field == 'health_conditions':
+            return json.loads(value) if value else []
+        if field == 'age':
+            return str(value)
+        if field == 'notification':
+            return bool(value)
+        if field == 'weekly_hist':
+            return decode_weekly_hist(value, self.today)
+        return value
+
+    def to_userdata(self):
+        """Group the loaded fields into the user_data / water_data / settings layout"""
+        data = {
+            group: {field: self[field] for field in fields if field in self}
+            for group, fields in USER_GROUPS.items()
         }
-    return None
+        data['water_data']['yesterday'] = str(self.today)
+        return data
 
-def update_water_intake(id_user, water_data):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
 
-    cursor.execute('''
-        UPDATE water_data
-        SET water_intake = ?, streak = ?, whole_sips = ?, 
-            weekly_hist = ?, yesterday = ?, data = ?
-        WHERE id_user = ?
-    ''', (
-        water_data['water_intake'],
-        water_data['streak'],
-        water_data['whole_sips'],
-        json.dumps(water_data['weekly_hist']),
-        water_data['yesterday'],
-        json.dumps(water_data['data']),
-        id_user
-    ))
-
-    conn.commit()
-    conn.close()
+def decode_weekly_hist(value, today):
+    """Turn the 'day=total,...' rollup string into this week's WeekRing"""
+    weekly_hist = week_ring.WeekRing.for_day(today)
+    for item in value.split(',') if value else ():
+        day, total = item.split('=')
+        weekly_hist.set(date.fromisoformat(day), int(total))
+    return weekly_hist
 
 
-def update_water_settings(id_user, name, age, water_goal):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+def load_user(id_user, fields=None, today=None):
+    """Fetch a user in one joined statement, projecting only ``fields``.
 
-    cursor.execute('''
-        UPDATE users
-        SET name = ?, age = ?, water_goal = ?
-        WHERE id = ?
-    ''', (name, age, water_goal, id_user))
+    ``today`` defaults to the user's local date.
+    """
+    fields = list(fields or USER_FIELDS)
+    unknown = set(fields) - set(USER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
 
-    conn.commit()
-    conn.close()
+    columns = ',\n'.join(f'{USER_FIELDS[f]} AS {f}' for f in fields)
 
-def update_remainder(id_user, settings):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    with connection() as conn:
+        cursor = conn.cursor()
+        today = today or local_today(user_timezone(cursor, id_user))
+        monday = today - timedelta(days=today.weekday())
+        cursor.execute(f'''
+            SELECT {columns}
+            FROM users u
+            JOIN water_data w ON w.id_user = u.id
+            JOIN settings s ON s.id_user = u.id
+            WHERE u.id = :id_user
+        ''', {
+            'id_user': id_user,
+            'today': str(today),
+            'monday': str(monday),
+            'sunday': str(monday + timedelta(days=6)),
+        })
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+    return UserRecord(id_user, today, dict(zip(fields, row)))
 
-    cursor.execute('''
-        UPDATE settings
-        SET notification = ?, reminder_interval_user = ?
-        WHERE id_user = ?
-    ''', (int(settings['notification']), settings['reminder_interval_user'], id_user))
 
-    conn.commit()
-    conn.close()
+def get_userdata(id_user):
+    record = load_user(id_user)
+    return record.to_userdata() if record else None
+
+def log_intake(id_user, ml, unit='ml'):
+    """Append a single sip to intake_events and roll it into daily_totals"""
+    log_intakes([(id_user, datetime.now().astimezone(), ml, unit)])
+
+@retry_on_busy
+def log_intakes(events):
+    """Write a batch of (id_user, logged_at, ml, unit) sips in one transaction.
+
+    intake_events.logged_at is the user's local wall-clock time, so its date
+    is the daily_totals day. An aware ``logged_at`` is converted to the
+    user's timezone; a naive one (imports, the legacy migration) is taken as
+    already local. Every event gets its own intake_events row, but
+    daily_totals receives a single merged upsert per user and day.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        zones = user_zones(cursor, {event[0] for event in events if event[1].tzinfo is not None})
+
+        rows = []
+        deltas = {}
+        first_days = {}
+        for id_user, logged_at, ml, unit in events:
+            if logged_at.tzinfo is not None:
+                logged_at = logged_at.astimezone(zones.get(id_user)).replace(tzinfo=None)
+            rows.append((id_user, logged_at.strftime('%Y-%m-%d %H:%M:%S'), int(ml), unit))
+            key = (id_user, logged_at.date())
+            total, sips = deltas.get(key, (0, 0))
+            deltas[key] = (total + int(ml), sips + 1)
+            first_days[id_user] = min(first_days.get(id_user, key[1]), key[1])
+
+        cursor.executemany('''
+            INSERT INTO intake_events (id_user, logged_at, ml, unit)
+            VALUES (?, ?, ?, ?)
+        ''', rows)
+        for (id_user, day), (total, sips) in deltas.items():
+            add_to_daily_total(cursor, id_user, day, total, sips)
+        # A sip for a day the rollover has already closed (a late flush, an
+        # import) makes the stored streak stale; load_user walks until the
+        # next rollover
+        cursor.executemany('''
+            UPDATE water_data SET yesterday = NULL
+            WHERE id_user = ? AND yesterday > ?
+        ''', [(id_user, str(day)) for id_user, day in first_days.items()])
+    return len(deltas)
+
+@retry_on_busy
+def update_water_settings(id_user, name, age, water_goal):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE users
+            SET name = ?, age = ?, water_goal = ?
+            WHERE id = ?
+        ''', (name, age, water_goal, id_user))
+        today = local_today(user_timezone(cursor, id_user))
+        cursor.execute('''
+            UPDATE daily_totals
+            SET goal_at_time = ?, goal_met = total_ml >= ?
+            WHERE id_user = ? AND day = ?
+        ''', (water_goal, water_goal, id_user, str(today)))
+
+@retry_on_busy
+def update_user_timezone(id_user, timezone):
+    """Move a user to another IANA timezone (None: the server's local time).
+
+    Days already recorded keep their dates. The stored streak is dropped,
+    since "yesterday" may now be a different day.
+    """
+    if timezone and zone(timezone) is None:
+        raise ValueError(f"Unknown timezone: {timezone}")
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('UPDATE users SET timezone = ? WHERE id = ?', (timezone or None, id_user))
+        cursor.execute('UPDATE water_data SET yesterday = NULL WHERE id_user = ?', (id_user,))
 
-def get_all_user_name():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+@retry_on_busy
+def update_remainder(id_user, settings):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE settings
+            SET notification = ?, reminder_interval_user = ?
+            WHERE id_user = ?
+        ''', (int(settings['notification']), settings['reminder_interval_user'], id_user))
+
+def get_reminder_settings():
+    """(id_user, notification, reminder_interval_user) for every user.
+
+    A deliberate full pass over settings, run once when the reminder
+    scheduler starts.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id_user, notification, reminder_interval_user FROM settings')
+        return [(id_user, bool(notification), interval) for id_user, notification, interval in cursor.fetchall()]
+
+def user_timezones():
+    """Distinct timezones in use (None for users on the server's local time)"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT timezone FROM users')
+        return [row[0] for row in cursor.fetchall()]
+
+@retry_on_busy
+def roll_over_users(timezone, today, after=0, limit=500):
+    """Start ``today`` for the next chunk of users in ``timezone``.
+
+    Missed days need no rows: every reader counts a day without a
+    daily_totals row as 0. What does change at midnight is the streak, so
+    up to ``limit`` users with id > ``after`` get it computed once, in one
+    set-based UPDATE, and stored in water_data.streak with ``yesterday`` set
+    to the day it is valid for. load_user reads the stored value while it is
+    current and walks daily_totals otherwise. Users already on ``today`` are
+    left alone, so rerunning for the same day is a no-op. Returns (last id,
+    users rolled over); the last id is None once the timezone has no users
+    left.
+    """
+    params = {'timezone': timezone, 'today': str(today), 'after': after, 'limit': limit}
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('''
+            SELECT id FROM users
+            WHERE timezone IS :timezone AND id > :after
+            ORDER BY id
+            LIMIT :limit
+        ''', params)
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return None, 0
+
+        params['first'], params['last'] = ids[0], ids[-1]
+        streak = STREAK_WALK.replace('u.id', 'water_data.id_user')
+        cursor.execute(f'''
+            UPDATE water_data SET streak = {streak}, yesterday = :today
+            WHERE id_user IN (
+                SELECT id FROM users
+                WHERE timezone IS :timezone AND id BETWEEN :first AND :last)
+              AND (yesterday IS NULL OR yesterday < :today)
+        ''', params)
+        return ids[-1], cursor.rowcount
+
+def has_users():
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM users)')
+        return bool(cursor.fetchone()[0])
 
-    cursor.execute('SELECT username FROM users ORDER BY username')
-    user_name = [row[0] for row in cursor.fetchall()]
+def search_usernames(prefix='', limit=10, after=None):
+    """Return up to ``limit`` usernames starting with ``prefix``, in order.
 
-    conn.close()
-    return user_name
+    Pages are keyset-based: pass the last name of the previous page as
+    ``after``. Both the prefix and the cursor are ranges on the unique
+    username index, so the cost does not grow with the number of users.
+    """
+    low = max(prefix, after) if after is not None else prefix
+    high = prefix + chr(0x10FFFF)
+    comparison = '>' if after is not None and after >= prefix else '>='
 
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT username FROM users
+            WHERE username {comparison} ? AND username < ?
+            ORDER BY username
+            LIMIT ?
+        ''', (low, high, limit))
+        return [row[0] for row in cursor.fetchall()]
+
+@retry_on_busy
 def reset_water_intake(id_user):
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE water_data
-        SET water_intake = 0
-        WHERE id_user = ?
-    ''', (id_user,))
+    # intake_events is append-only, so today's total is cancelled out with
+    # a compensating 'reset' row rather than deleting the sips.
+    with connection() as conn:
+        cursor = conn.cursor()
+        now = local_now(user_timezone(cursor, id_user))
+        today = now.date()
+        cursor.execute('''
+            SELECT COALESCE(SUM(ml), 0) FROM intake_events
+            WHERE id_user = ? AND logged_at >= ? AND logged_at < ?
+        ''', (id_user, str(today), str(today + timedelta(days=1))))
+        total = cursor.fetchone()[0]
+
+        if total:
+            cursor.execute('''
+                INSERT INTO intake_events (id_user, logged_at, ml, unit)
+                VALUES (?, ?, ?, 'reset')
+            ''', (id_user, now.strftime('%Y-%m-%d %H:%M:%S'), -total))
+            add_to_daily_total(cursor, id_user, today, -total, 0)
 
-    conn.commit()
-    conn.close()
+        cursor.execute('''
+            UPDATE water_data
+            SET water_intake = 0
+            WHERE id_user = ?
+        ''', (id_user,))
 
 database()
-
@@ -9,7 +9,8 @@ import streamlit as st
 import random
 import time
 import asyncio
-from streamlit.components.v1 import html
+
+import assets
 
 def games():
     """Games menu and games"""
@@ -126,288 +127,8 @@ def show_snake():
         """, unsafe_allow_html=True)
 
     
-    snake_game_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{
-                margin: 0;
-                padding: 20px;
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-                font-family: Arial, sans-serif;
-            }}
-            #gameContainer {{
-                text-align: center;
-                background: white;
-                padding: 20px;
-                border-radius: 20px;
-                box-shadow: 0 10px 40px rgba(0,0,0,0.3);
-            }}
-            #gameCanvas {{
-                border: 3px solid #333;
-                border-radius: 10px;
-                background: #000;
-            }}
-            #gameInfo {{
-                margin: 15px 0;
-                font-size: 18px;
-                font-weight: bold;
-            }}
-            #gameStatus {{
-                margin: 10px 0;
-                font-size: 16px;
-                color: #666;
-            }}
-            .btn {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                padding: 12px 24px;
-                border-radius: 25px;
-                font-size: 16px;
-                cursor: pointer;
-                margin: 5px;
-                transition: transform 0.2s;
-            }}
-            .btn:hover {{
-                transform: translateY(-2px);
-            }}
-            .game-over {{
-                color: #dc2626;
-                font-size: 24px;
-                font-weight: bold;
-                margin: 20px 0;
-            }}
-        </style>
-    </head>
-    <body>
-        <div id="gameContainer">
-            <canvas id="gameCanvas" width="600" height="590"></canvas>
-            <div id="gameInfo">
-                <div>mark: <span id="mark">0</span> 💧 | Length: <span id="length">3</span></div>
-            </div>
-            <div id="gameStatus">Press SPACE to start/pause | Use Arrow Keys to move</div>
-            <div id="gameOver" class="game-over" style="display: none;">
-                Game Over! 💀<br>
-                <button class="btn" onclick="restartGame()">🔄 Play Again</button>
-                <button class="btn" onclick="backToMenu()">← Back to Games</button>
-            </div>
-        </div>
-
-        <script>
-            const canvas = document.getElementById('gameCanvas');
-            const ctx = canvas.getContext('2d');
-            const markElement = document.getElementById('mark');
-            const lengthElement = document.getElementById('length');
-            const gameOverElement = document.getElementById('gameOver');
-            const gameStatusElement = document.getElementById('gameStatus');
-
-            // Game settings
-            const gridSize = 30;
-            const tileCount = canvas.width / gridSize;
-
-            let snake = [
-                {{x: 10, y: 10}},
-                {{x: 9, y: 10}},
-                {{x: 8, y: 10}}
-            ];
-            let food = {{x: 15, y: 15}};
-            let dx = 1;
-            let dy = 0;
-            let mark = 0;
-            let gameRunning = false;
-            let gameOver = false;
-
-            // Generate random food position
-            function generateFood() {{
-                food = {{
-                    x: Math.floor(Math.random() * tileCount),
-                    y: Math.floor(Math.random() * tileCount)
-                }};
-                
-                // Make sure food doesn't spawn on snake
-                for (let segment of snake) {{
-                    if (segment.x === food.x && segment.y === food.y) {{
-                        generateFood();
-                        return;
-                    }}
-                }}
-            }}
-
-            // Draw game elements
-            function drawGame() {{
-                // Clear canvas
-                ctx.fillStyle = '#000';
-                ctx.fillRect(0, 0, canvas.width, canvas.height);
-
-                // Draw snake
-                ctx.fillStyle = '#10b981';
-                for (let i = 0; i < snake.length; i++) {{
-                    if (i === 0) {{
-                        // Snake head
-                        ctx.fillStyle = '#059669';
-                        ctx.fillRect(snake[i].x * gridSize, snake[i].y * gridSize, gridSize-2, gridSize-2);
-                        
-                        // Draw eyes
-                        ctx.fillStyle = '#fff';
-                        ctx.fillRect(snake[i].x * gridSize + 8, snake[i].y * gridSize + 6, 4, 4);
-                        ctx.fillRect(snake[i].x * gridSize + 18, snake[i].y * gridSize + 6, 4, 4);
-                    }} else {{
-                        // Snake body
-                        ctx.fillStyle = '#10b981';
-                        ctx.fillRect(snake[i].x * gridSize, snake[i].y * gridSize, gridSize-2, gridSize-2);
-                    }}
-                }}
-
-                // Draw food (water drop)
-                ctx.fillStyle = '#3b82f6';
-                ctx.beginPath();
-                ctx.arc(
-                    food.x * gridSize + gridSize/2, 
-                    food.y * gridSize + gridSize/2, 
-                    gridSize/2 - 2, 
-                    0, 
-                    2 * Math.PI
-                );
-                ctx.fill();
-                
-                // Add water drop highlight
-                ctx.fillStyle = '#60a5fa';
-                ctx.beginPath();
-                ctx.arc(
-                    food.x * gridSize + gridSize/2 - 5, 
-                    food.y * gridSize + gridSize/2 - 5, 
-                    4, 
-                    0, 
-                    2 * Math.PI
-                );
-                ctx.fill();
-            }}
-
-            // Move snake
-            function moveSnake() {{
-                if (!gameRunning || gameOver) return;
-
-                const head = {{x: snake[0].x + dx, y: snake[0].y + dy}};
-
-                // Check wall collision
-                if (head.x < 0 || head.x >= tileCount || head.y < 0 || head.y >= tileCount) {{
-                    gameOver = true;
-                    gameRunning = false;
-                    showGameOver();
-                    return;
-                }}
-
-                // Check self collision
-                for (let segment of snake) {{
-                    if (head.x === segment.x && head.y === segment.y) {{
-                        gameOver = true;
-                        gameRunning = false;
-                        showGameOver();
-                        return;
-                    }}
-                }}
-
-                snake.unshift(head);
-
-                // Check food collision
-                if (head.x === food.x && head.y === food.y) {{
-                    mark += 10;
-                    markElement.textContent = mark;
-                    lengthElement.textContent = snake.length;
-                    generateFood();
-                }} else {{
-                    snake.pop();
-                }}
-
-                drawGame();
-            }}
-
-            // Show game over screen
-            function showGameOver() {{
-                gameOverElement.style.display = 'block';
-                gameStatusElement.textContent = `Final mark: ${{mark}} 💧`;
-            }}
-
-            // Restart game
-            function restartGame() {{
-                snake = [
-                    {{x: 10, y: 10}},
-                    {{x: 9, y: 10}},
-                    {{x: 8, y: 10}}
-                ];
-                dx = 1;
-                dy = 0;
-                mark = 0;
-                gameOver = false;
-                gameRunning = true;
-                markElement.textContent = mark;
-                lengthElement.textContent = snake.length;
-                gameOverElement.style.display = 'none';
-                gameStatusElement.textContent = 'Game Running - Use Arrow Keys | SPACE to pause';
-                generateFood();
-                drawGame();
-            }}
-
-            // Back to menu
-            function backToMenu() {{
-                window.parent.postmotivation({{type: 'backToMenu'}}, '*');
-            }}
-
-            // Keyboard controls
-            document.addEventListener('keydown', (e) => {{
-                if (gameOver) return;
-
-                switch(e.key) {{
-                    case 'ArrowUp':
-                        if (dy !== 1) {{ dx = 0; dy = -1; }}
-                        break;
-                    case 'ArrowDown':
-                        if (dy !== -1) {{ dx = 0; dy = 1; }}
-                        break;
-                    case 'ArrowLeft':
-                        if (dx !== 1) {{ dx = -1; dy = 0; }}
-                        break;
-                    case 'ArrowRight':
-                        if (dx !== -1) {{ dx = 1; dy = 0; }}
-                        break;
-                    case ' ':
-                        e.preventDefault();
-                        if (!gameOver) {{
-                            gameRunning = !gameRunning;
-                            gameStatusElement.textContent = gameRunning ? 
-                                'Game Running - Use Arrow Keys | SPACE to pause' : 
-                                'Game Paused - Press SPACE to resume';
-                        }}
-                        break;
-                }}
-            }});
-
-            // Game loop
-            function gameLoop() {{
-                moveSnake();
-                setTimeout(gameLoop, 150); // Game speed
-            }}
-
-            // Initialize game
-            generateFood();
-            drawGame();
-            gameLoop();
-
-            // Focus canvas for keyboard input
-            canvas.focus();
-            canvas.tabIndex = 1;
-        </script>
-    </body>
-    </html>
-    """
-
-    
-    html(snake_game_html, height=800)
+    # The game is a static component (static/snake/), loaded once and cached by the browser
+    assets.component('snake')(key='snake_game')
 
     
     if st.button("← Back to Games", key="back_to_games"):
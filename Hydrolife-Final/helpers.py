@@ -3,104 +3,79 @@ Helper functions for HydroLife
 Shared utilities across all pages
 """
 
-from datetime import datetime, date
+from bisect import bisect_right
+
+# Lookup tables: a value's band is the number of thresholds it has reached
+AGE_THRESHOLDS = [18, 50, 65]
+AGE_GOALS = [2000, 2500, 2200, 2000]
+
+CONDITIONS = ['athletic', 'pregnant', 'diabetes', 'kidney']
+CONDITION_ML = [1000, 700, 500, -500]
+
+MIN_GOAL = 1500
+MAX_GOAL = 5000
+
+AVATAR_THRESHOLDS = [25, 50, 75, 100]
+AVATARS = ["🌑", "🌒", "🌓", "🌔", "🌕"]
+
+LEVEL_THRESHOLDS = [1000, 1500, 2000, 2500, 3000, 3500, 4000]
+
+def _band(thresholds, value):
+    """How many thresholds ``value`` has reached; NaN reaches none"""
+    if value != value:
+        return 0
+    return bisect_right(thresholds, value)
+
+def _bands(thresholds, values):
+    """Vectorized _band() over an array"""
+    import numpy as np
+
+    values = np.asarray(values)
+    bands = np.searchsorted(thresholds, values, side='right')
+    if values.dtype.kind == 'f':
+        bands[np.isnan(values)] = 0
+    return bands
 
 def calculate_goal(age, health_conditions):
     """Calculate recommended water intake based on age and health conditions"""
-    age = int(age)
-    nor_goal = 2500  
-    
-    
-    if age < 18:
-        nor_goal = 2000
-    elif age >= 18 and age < 30:
-        nor_goal = 2500
-    elif age >= 30 and age < 50:
-        nor_goal = 2500
-    elif age >= 50 and age < 65:
-        nor_goal = 2200
-    else:  
-        nor_goal = 2000
-    
-    
-    if 'athletic' in health_conditions:
-        nor_goal += 1000
-    if 'pregnant' in health_conditions:
-        nor_goal += 700
-    if 'diabetes' in health_conditions:
-        nor_goal += 500
-    if 'kidney' in health_conditions:
-        nor_goal -= 500
-    
-    return max(1500, min(nor_goal, 5000))
+    nor_goal = AGE_GOALS[_band(AGE_THRESHOLDS, int(age))]
+    for condition, ml in zip(CONDITIONS, CONDITION_ML):
+        if condition in health_conditions:
+            nor_goal += ml
+    return max(MIN_GOAL, min(nor_goal, MAX_GOAL))
+
+def conditions_matrix(health_conditions_per_user):
+    """Boolean (users x CONDITIONS) matrix for calculate_goal_batch"""
+    import numpy as np
+
+    return np.array([
+        [condition in conditions for condition in CONDITIONS]
+        for conditions in health_conditions_per_user
+    ], dtype=bool).reshape(-1, len(CONDITIONS))
+
+def calculate_goal_batch(ages, conditions):
+    """calculate_goal() for many users: ages array plus a conditions_matrix()"""
+    import numpy as np
+
+    ages = np.asarray(ages).astype(np.int64)
+    goals = np.asarray(AGE_GOALS)[_bands(AGE_THRESHOLDS, ages)]
+    goals = goals + np.asarray(conditions, dtype=np.int64) @ np.asarray(CONDITION_ML)
+    return np.clip(goals, MIN_GOAL, MAX_GOAL)
 
 def get_avatar(progress):
     """Get avatar emoji based on progress percentage"""
-    if progress >= 100:
-        return "🌕"
-    elif progress >= 75:
-        return "🌔"
-    elif progress >= 50:
-        return "🌓"
-    elif progress >= 25:
-        return "🌒"
-    else:
-        return "🌑"
+    return AVATARS[_band(AVATAR_THRESHOLDS, progress)]
+
+def get_avatar_batch(progresses):
+    """get_avatar() for many progress percentages; returns an array of emoji"""
+    import numpy as np
+
+    return np.asarray(AVATARS)[_bands(AVATAR_THRESHOLDS, progresses)]
 
 def get_level(intake):
     """Get level based on water intake"""
-    if intake >= 4000:
-        return 8
-    elif intake >= 3500:
-        return 7
-    elif intake >= 3000:
-        return 6
-    elif intake >= 2500:
-        return 5
-    elif intake >= 2000:
-        return 4
-    elif intake >= 1500:
-        return 3
-    elif intake >= 1000:
-        return 2
-    else:
-        return 1
-
-def reset_daily(water_data):
-    """Check if it's a new day and reset daily intake"""
-    today = str(date.today())
-    yesterday = water_data.get('yesterday', today)
-    
-    if yesterday != today:
-        
-        yesterday_intake = water_data.get('water_intake', 0)
-        
-        
-        data = water_data.get('data', {})
-        data[yesterday] = yesterday_intake
-        
-        
-        water_goal = water_data.get('water_goal', 2500)
-        goal_comp = yesterday_intake >= water_goal
-        new_streak = water_data.get('streak', 0) + 1 if goal_comp else 0
-        
-        
-        yesterdaytime = datetime.strptime(yesterday, '%Y-%m-%d')
-        day_name = yesterdaytime.strftime('%a')
-        
-        weekly_hist = water_data.get('weekly_hist', [])
-        
-        for i, day in enumerate(weekly_hist):
-            if day['day'] == day_name:
-                weekly_hist[i]['water'] = yesterday_intake
-                break
-        
-        
-        water_data['water_intake'] = 0
-        water_data['yesterday'] = today
-        water_data['streak'] = new_streak
-        water_data['weekly_hist'] = weekly_hist
-        water_data['data'] = data
-    
-    return water_data
+    return _band(LEVEL_THRESHOLDS, intake) + 1
 
+def get_level_batch(intakes):
+    """get_level() for many intakes"""
+    return _bands(LEVEL_THRESHOLDS, intakes) + 1
@@ -0,0 +1,176 @@
+"""
+Bulk import/export of hydration history for HydroLife
+Streams intake_events to and from Parquet or Arrow IPC files in chunks
+"""
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import database
+
+CHUNK_SIZE = 50_000
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Rows carry the username as well as the id so a file can be imported into
+# a different database, where user ids won't line up. logged_at is the
+# user's local wall-clock time, as stored in intake_events.
+EVENT_SCHEMA = pa.schema([
+    ('id_user', pa.int64()),
+    ('username', pa.string()),
+    ('logged_at', pa.timestamp('s')),
+    ('ml', pa.int32()),
+    ('unit', pa.string()),
+])
+
+
+def is_parquet(path):
+    return str(path).lower().endswith('.parquet')
+
+
+def _open_writer(path):
+    if is_parquet(path):
+        return pq.ParquetWriter(path, EVENT_SCHEMA, compression='zstd')
+    return pa.ipc.new_file(path, EVENT_SCHEMA)
+
+
+def _iter_batches(path, batch_size):
+    if is_parquet(path):
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+        return
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def export_history(path, chunk_size=CHUNK_SIZE):
+    """Write every intake event to ``path`` (.parquet, otherwise Arrow IPC), one chunk at a time"""
+    exported = 0
+    with database.connection() as conn, _open_writer(path) as writer:
+        cursor = conn.execute('''
+            SELECT e.id_user, u.username, e.logged_at, e.ml, e.unit
+            FROM intake_events e
+            JOIN users u ON u.id = e.id_user
+            ORDER BY e.id
+        ''')
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            id_user, username, logged_at, ml, unit = zip(*rows)
+            batch = pa.RecordBatch.from_arrays([
+                pa.array(id_user, pa.int64()),
+                pa.array(username, pa.string()),
+                pc.strptime(pa.array(logged_at, pa.string()), format=TIMESTAMP_FORMAT, unit='s'),
+                pa.array(ml, pa.int32()),
+                pa.array(unit, pa.string()),
+            ], schema=EVENT_SCHEMA)
+            writer.write_batch(batch)
+            exported += len(rows)
+    return exported
+
+
+def _lookup_user_ids(conn, usernames, known):
+    """Fill ``known`` with username -> id for names not looked up yet"""
+    missing = [name for name in set(usernames) if name not in known]
+    for start in range(0, len(missing), 500):
+        chunk = missing[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor = conn.execute(
+            f'SELECT username, id FROM users WHERE username IN ({placeholders})', chunk
+        )
+        known.update(cursor.fetchall())
+        for name in chunk:
+            known.setdefault(name, None)
+
+
+def _batch_columns(batch):
+    """(usernames, logged_at, ml, unit) lists for one batch"""
+    # Casting whole seconds to string gives 'YYYY-MM-DD HH:MM:SS', the
+    # same text format intake_events uses (strftime would add fractions)
+    seconds = pc.cast(batch.column('logged_at'), pa.timestamp('s'), safe=False)
+    return (
+        batch.column('username').to_pylist(),
+        pc.cast(seconds, pa.string()).to_pylist(),
+        batch.column('ml').to_pylist(),
+        batch.column('unit').to_pylist(),
+    )
+
+
+def _user_spans(path, batch_size):
+    """username -> (first, last) logged_at of that user's rows in ``path``"""
+    spans = {}
+    for batch in _iter_batches(path, batch_size):
+        usernames, logged_at, _, _ = _batch_columns(batch)
+        for name, at in zip(usernames, logged_at):
+            first, last = spans.get(name, (at, at))
+            spans[name] = (min(first, at), max(last, at))
+    return spans
+
+
+def _overlapping_users(conn, spans, known):
+    """Usernames that already have events inside their span in the file"""
+    overlapping = []
+    for name, (first, last) in spans.items():
+        id_user = known[name]
+        if id_user is None:
+            continue
+        row = conn.execute('''
+            SELECT 1 FROM intake_events
+            WHERE id_user = ? AND logged_at BETWEEN ? AND ?
+            LIMIT 1
+        ''', (id_user, first, last)).fetchone()
+        if row:
+            overlapping.append(name)
+    return overlapping
+
+
+def import_history(path, batch_size=CHUNK_SIZE):
+    """Append events from ``path`` with executemany, one transaction per batch.
+
+    Rows are matched to users by username; rows for unknown users are
+    skipped. daily_totals is rebuilt for every user that received events.
+    Returns (imported, skipped).
+
+    Raises ValueError, before writing anything, if a user already has
+    events between their first and last row in the file, so importing the
+    same file twice can't double a history. Events have no unique key (two
+    identical sips in the same second are both real), so overlapping files
+    are refused rather than merged.
+    """
+    known = {}
+    touched = set()
+    imported = skipped = 0
+
+    spans = _user_spans(path, batch_size)
+    with database.connection() as conn:
+        _lookup_user_ids(conn, list(spans), known)
+        overlapping = _overlapping_users(conn, spans, known)
+    if overlapping:
+        raise ValueError(f"{path} overlaps existing history for: {', '.join(sorted(overlapping))}")
+
+    for batch in _iter_batches(path, batch_size):
+        usernames, logged_at, ml, unit = _batch_columns(batch)
+
+        with database.connection() as conn:
+            _lookup_user_ids(conn, usernames, known)
+            rows = []
+            for name, at, amount, kind in zip(usernames, logged_at, ml, unit):
+                id_user = known[name]
+                if id_user is None:
+                    skipped += 1
+                    continue
+                rows.append((id_user, at, amount, kind))
+                touched.add(id_user)
+
+            conn.executemany('''
+                INSERT INTO intake_events (id_user, logged_at, ml, unit)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+        imported += len(rows)
+
+    for id_user in touched:
+        database.rebuild_daily_totals(id_user)
+    return imported, skipped
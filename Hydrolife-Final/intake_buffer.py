@@ -0,0 +1,93 @@
+"""
+Write-behind buffer for water intake
+Collects quick successive sips per user and writes them in one transaction
+"""
+
+import atexit
+import os
+import threading
+from datetime import datetime
+
+from database import log_intakes
+
+FLUSH_DELAY = float(os.environ.get("HYDROLIFE_FLUSH_DELAY", 2.0))
+
+_lock = threading.Lock()
+_pending = {}
+_timer = None
+_stats = {
+    'queued': 0,
+    'flushes': 0,
+    'written': 0,
+    'rollup_writes': 0,
+    'coalesced': 0,
+}
+
+
+def add(id_user, ml, unit='ml'):
+    """Queue a sip; it is written on the next timer tick, page change or logout"""
+    global _timer
+    with _lock:
+        # Aware, so log_intakes can date it in the user's timezone
+        _pending.setdefault(id_user, []).append((id_user, datetime.now().astimezone(), ml, unit))
+        _stats['queued'] += 1
+        if _timer is None:
+            _timer = threading.Timer(FLUSH_DELAY, _flush_on_timer)
+            _timer.daemon = True
+            _timer.start()
+
+
+def pending(id_user):
+    """Total ml still waiting to be written for a user"""
+    with _lock:
+        return sum(event[2] for event in _pending.get(id_user, []))
+
+
+def _flush_on_timer():
+    global _timer
+    with _lock:
+        _timer = None
+    flush()
+
+
+def flush(id_user=None):
+    """Write pending sips for one user (or everyone) in a single transaction"""
+    with _lock:
+        if id_user is None:
+            batches = list(_pending.values())
+            _pending.clear()
+        else:
+            batches = [_pending.pop(id_user, [])]
+
+    events = [event for batch in batches for event in batch]
+    if not events:
+        return 0
+
+    try:
+        rollup_writes = log_intakes(events)
+    except Exception:
+        # Put the sips back so the next flush (or shutdown) retries them
+        with _lock:
+            for event in reversed(events):
+                _pending.setdefault(event[0], []).insert(0, event)
+        raise
+
+    with _lock:
+        _stats['flushes'] += 1
+        _stats['written'] += len(events)
+        _stats['rollup_writes'] += rollup_writes
+        _stats['coalesced'] += len(events) - 1
+    return len(events)
+
+
+def buffer_stats():
+    """Counters: sips queued/written, flush transactions and commits saved by coalescing"""
+    with _lock:
+        stats = dict(_stats)
+        stats['pending'] = sum(len(batch) for batch in _pending.values())
+    return stats
+
+
+# Streamlit stops its server cleanly on Ctrl+C/SIGTERM, so the interpreter
+# runs atexit hooks and nothing queued is lost on shutdown.
+atexit.register(flush)
@@ -3,7 +3,7 @@ Login/Signup page for HydroLife
 """
 
 import streamlit as st
-from database import user_exists, verify_user, get_all_user_name
+from database import user_exists, verify_user, has_users, search_usernames
 
 def login():
     """Show login/signup page"""
@@ -24,9 +24,7 @@ def login():
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col2:
-        user_name = get_all_user_name()
-        
-        if user_name:
+        if has_users():
             st.markdown("""
             <div style="background: #001F3F; padding: 32px; border-radius: 24px; box-shadow: 0 10px 40px rgba(0,0,0,0.1); color: white;">
             <h3 style="text-align: center; margin-bottom: 24px;">Are you a returning user?</h3>
@@ -45,7 +43,7 @@ def login():
             st.markdown("<br>", unsafe_allow_html=True)
             
             if type_user == "Existing User":
-                existing_user_login(user_name)
+                existing_user_login()
             else:
                 new_user_signup()
         else:
@@ -59,7 +57,7 @@ def login():
             st.markdown("<br>", unsafe_allow_html=True)
             new_user_signup()
 
-def existing_user_login(user_name):
+def existing_user_login():
     """Show login form for existing users"""
     st.markdown("""
  <div style="background: white; padding: 32px; border-radius: 24px; box-shadow: 0 10px 40px rgba(0,0,0,0.1);">
@@ -73,11 +71,17 @@ def existing_user_login(user_name):
     
     st.markdown("<br>", unsafe_allow_html=True)
     
-    username = st.selectbox(
-        "Select your username:",
-        options=user_name,
-        index=0
-    )
+    username = st.text_input(
+        "Enter your username:",
+        placeholder="Your username",
+        max_chars=50
+    ).strip()
+
+    # Type-ahead: offer a few matching names instead of listing everyone
+    if username:
+        matches = search_usernames(username, limit=5)
+        if matches and username not in matches:
+            username = st.selectbox("Did you mean:", options=matches, index=0)
     
     password = st.text_input(
         "Enter your password:",
@@ -95,10 +99,16 @@ def existing_user_login(user_name):
     
     with col2:
         if st.button("Login →", use_container_width=True, type="primary"):
-            if not password:
+            if not username:
+                st.error("Please enter your username")
+            elif not password:
                 st.error("Please enter your password")
             else:
-                id_user = verify_user(username, password)
+                try:
+                    id_user = verify_user(username, password)
+                except TimeoutError:
+                    st.error("Lots of people are logging in right now. Please try again in a moment.")
+                    st.stop()
                 if id_user:
                     st.session_state.logged_in = True
                     st.session_state.id_user = id_user
@@ -107,7 +117,7 @@ def existing_user_login(user_name):
                     st.success(f"Welcome back, {username}! 💧")
                     st.rerun()
                 else:
-                    st.error("Invalid password. Please try again.")
+                    st.error("Invalid username or password. Please try again.")
 
 def new_user_signup():
     """Show signup form for new users"""
@@ -0,0 +1,185 @@
+"""
+Maintenance commands for HydroLife
+Run from this folder, e.g.  python manage.py rebuild-rollups
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+import database
+
+
+def rebuild_rollups(args):
+    """Recompute daily_totals from intake_events"""
+    rows = database.rebuild_daily_totals(args.user)
+    scope = f"user {args.user}" if args.user else "all users"
+    print(f"Rebuilt {rows} daily_totals rows for {scope}")
+
+
+def export_history(args):
+    """Stream all users' intake history to a .parquet or Arrow IPC file"""
+    import history_io
+
+    count = history_io.export_history(args.path, args.chunk_size)
+    print(f"Exported {count} intake events to {args.path}")
+
+
+def import_history(args):
+    """Append intake history from a .parquet or Arrow IPC file"""
+    import history_io
+
+    try:
+        imported, skipped = history_io.import_history(args.path, args.chunk_size)
+    except ValueError as e:
+        print(f"Not imported: {e}")
+        sys.exit(1)
+    print(f"Imported {imported} intake events from {args.path} ({skipped} skipped: unknown user)")
+
+
+def migrate(args):
+    """Apply pending schema migrations and show the schema version"""
+    database.database()
+    with database.connection() as conn:
+        rows = conn.execute('''
+            SELECT version, description, applied_at FROM schema_version ORDER BY version
+        ''').fetchall()
+    for version, description, applied_at in rows:
+        print(f"{version:>3}  {applied_at}  {description}")
+
+
+def run_rollover(args):
+    """Close the previous day for every user (safe to rerun, e.g. from cron)"""
+    import rollover
+
+    database.database()
+    rolled = rollover.run_rollover(chunk_size=args.chunk_size)
+    for timezone, count in rolled.items():
+        print(f"{timezone or 'server time'}: rolled over {count} users")
+
+
+# Statements that read a whole table on purpose, and why
+DELIBERATE_SCANS = {
+    'SELECT id_user, notification, reminder_interval_user FROM settings':
+        'get_reminder_settings, one pass when the reminder scheduler starts',
+    'UPDATE water_data SET yesterday = NULL':
+        'rebuild_daily_totals for all users (and migration 6), which resets every stored streak',
+    'SELECT w.id_user, w.water_intake, w.yesterday, w.data FROM water_data w '
+    'WHERE NOT EXISTS (SELECT 1 FROM intake_events e WHERE e.id_user = w.id_user)':
+        'migrate_intake_events, the one-shot move of legacy history into intake_events',
+    'SELECT e.id_user, u.username, e.logged_at, e.ml, e.unit FROM intake_events e '
+    'JOIN users u ON u.id = e.id_user ORDER BY e.id':
+        'history_io.export_history, which streams every event to the file',
+}
+
+
+def exercise_queries():
+    """Call every database.py and history_io.py entry point once against the
+    current database"""
+    import history_io
+
+    ok, id_user = database.new_user("plan_user", "pw", "Plan", 30, [], 2500)
+    database.new_user("plan_user", "pw", "Plan", 30, [], 2500)
+    database.verify_user("plan_user", "pw")
+    database.user_exists("plan_user")
+    database.log_intake(id_user, 250)
+    database.log_intakes([(id_user, datetime.now(), 500, 'ml')])
+    data = database.get_userdata(id_user)
+    database.load_user(id_user, ['water_goal'])
+    database.update_water_settings(id_user, "Plan", 31, 2600)
+    database.update_remainder(id_user, data['settings'])
+    database.reset_water_intake(id_user)
+    database.has_users()
+    database.update_user_timezone(id_user, "Europe/Berlin")
+    database.user_timezones()
+    database.roll_over_users("Europe/Berlin", date.today() + timedelta(days=1))
+    database.search_usernames("plan", limit=5)
+    database.search_usernames("plan", limit=5, after="plan_user")
+    database.get_reminder_settings()
+    database.rebuild_daily_totals(id_user)
+    database.rebuild_daily_totals()
+    with database.connection() as conn:
+        database.migrate_intake_events(conn)
+
+    path = os.path.join(tempfile.mkdtemp(), "plans.parquet")
+    history_io.export_history(path)
+    try:
+        history_io.import_history(path)
+    except ValueError:
+        pass  # refused: the history is already there
+
+
+def check_plans(args):
+    """Fail if any query issued by database.py scans a table without an index,
+    apart from the DELIBERATE_SCANS"""
+    database.configure(os.path.join(tempfile.mkdtemp(), "plans.db"), size=1)
+
+    statements = []
+    with database.connection() as conn:
+        conn.set_trace_callback(statements.append)
+    exercise_queries()
+
+    failures = allowed = 0
+    with database.connection() as conn:
+        conn.set_trace_callback(None)
+        for sql in dict.fromkeys(statements):
+            if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")):
+                continue
+            problems = database.unindexed_steps(conn, sql)
+            if not problems:
+                continue
+            text = ' '.join(sql.split())
+            if text in DELIBERATE_SCANS:
+                allowed += 1
+                print(f"ALLOWED: {text}\n    {DELIBERATE_SCANS[text]}")
+                continue
+            failures += 1
+            print(f"NOT INDEXED: {text}")
+            for detail in problems:
+                print(f"    {detail}")
+
+    print(f"{len(set(statements))} statements checked, {failures} without an index"
+          f" ({allowed} deliberate scans allowed)")
+    if failures:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HydroLife maintenance commands")
+    parser.add_argument("--db", help="database file (default: hydrolife.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = sub.add_parser("rebuild-rollups", help=rebuild_rollups.__doc__)
+    rebuild.add_argument("--user", type=int, help="only rebuild this user id")
+    rebuild.set_defaults(func=rebuild_rollups)
+
+    export_cmd = sub.add_parser("export-history", help=export_history.__doc__)
+    export_cmd.add_argument("path")
+    export_cmd.add_argument("--chunk-size", type=int, default=50_000)
+    export_cmd.set_defaults(func=export_history)
+
+    import_cmd = sub.add_parser("import-history", help=import_history.__doc__)
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--chunk-size", type=int, default=50_000)
+    import_cmd.set_defaults(func=import_history)
+
+    migrate_cmd = sub.add_parser("migrate", help=migrate.__doc__)
+    migrate_cmd.set_defaults(func=migrate)
+
+    rollover_cmd = sub.add_parser("rollover", help=run_rollover.__doc__)
+    rollover_cmd.add_argument("--chunk-size", type=int, default=500)
+    rollover_cmd.set_defaults(func=run_rollover)
+
+    plans = sub.add_parser("check-plans", help=check_plans.__doc__)
+    plans.set_defaults(func=check_plans)
+
+    args = parser.parse_args()
+    if args.db:
+        database.configure(args.db)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Sound and tip packs for HydroLife
+Packs live in static/packs/<name>/ and are loaded once per process, so
+logging water reads nothing from disk. Sounds go through st.audio as bytes:
+Streamlit serves them from its media endpoint (under server.baseUrlPath,
+with the right content type) at a content-hashed URL the browser caches.
+"""
+
+import json
+import os
+import random
+import threading
+
+import assets
+
+SOUND_PACK = os.environ.get("HYDROLIFE_SOUND_PACK", "default")
+TIP_PACK = os.environ.get("HYDROLIFE_TIP_PACK", "default")
+PACKS_DIR = os.path.join(assets.STATIC_DIR, 'packs')
+
+AUDIO_FORMATS = {'.mp3': 'audio/mpeg', '.ogg': 'audio/ogg', '.wav': 'audio/wav'}
+
+_lock = threading.Lock()
+_sounds = {}
+_tips = ()
+
+
+def load_packs(sound_pack=SOUND_PACK, tip_pack=TIP_PACK):
+    """Load (or swap in) the sound pack and tip pack used by every session"""
+    global _sounds, _tips
+
+    sounds = {}
+    sound_dir = os.path.join(PACKS_DIR, sound_pack)
+    if os.path.isdir(sound_dir):
+        for filename in sorted(os.listdir(sound_dir)):
+            name, ext = os.path.splitext(filename)
+            if ext.lower() in AUDIO_FORMATS:
+                # A plain read, not mmap: st.audio only takes bytes (or a path
+                # it re-reads on every call) and copies them into Streamlit's
+                # in-memory media store, so a mapping would be copied on each play
+                with open(os.path.join(sound_dir, filename), 'rb') as f:
+                    sounds[name] = (f.read(), AUDIO_FORMATS[ext.lower()])
+
+    tips = ()
+    tips_file = os.path.join(PACKS_DIR, tip_pack, 'tips.json')
+    if os.path.exists(tips_file):
+        with open(tips_file, encoding='utf-8') as f:
+            tips = tuple(json.load(f))
+
+    with _lock:
+        _sounds, _tips = sounds, tips
+
+
+def sound(name):
+    """(bytes, mime type) of a sound in the current pack, or None"""
+    return _sounds.get(name)
+
+
+def random_tip():
+    return random.choice(_tips) if _tips else None
+
+
+def pack_stats():
+    with _lock:
+        return {'sounds': sorted(_sounds), 'tips': len(_tips)}
+
+
+load_packs()
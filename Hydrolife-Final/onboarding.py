@@ -5,7 +5,7 @@ Onboarding flow for new users
 import streamlit as st
 from database import new_user
 from helpers import calculate_goal
-from reminder_page import reminder_start 
+import user_cache
 
 def onboarding():
     """Complete onboarding flow for new users"""
@@ -191,7 +191,9 @@ def reminder_step():
                 reminder_interval_user = selected_reminder_interval
                 st.session_state.onboarding_data['reminder_interval_user'] = reminder_interval_user
 
-                success, result = new_user(username, password, name, age, health_conditions, water_goal)
+                # The browser's timezone; the day rolls over at the user's own midnight
+                success, result = new_user(username, password, name, age, health_conditions, water_goal,
+                                           timezone=st.context.timezone)
 
                 if success:
                     id_user = result
@@ -202,8 +204,11 @@ def reminder_step():
                     st.session_state.current_page = 'dashboard'
 
                     
-                    if reminder_interval_user > 0:
-                        reminder_start(reminder_interval_user)
+                    # Saves the chosen interval and schedules (or skips) the reminder
+                    user_cache.update_reminder(id_user, {
+                        'notification': reminder_interval_user > 0,
+                        'reminder_interval_user': reminder_interval_user or 60,
+                    })
 
                     
                     del st.session_state.onboarding_step
@@ -0,0 +1,160 @@
+"""
+Page registry for HydroLife
+Declares every page once (id, nav icon/label, loader, required session
+state); routing and the nav bar both read from here. A page module is
+imported the first time something routes to it, and every render is timed.
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+
+import database
+
+SLOW_PAGE_MS = float(os.environ.get("HYDROLIFE_SLOW_PAGE_MS", 500))
+
+# Pages with an icon appear in the nav bar, in this order. 'requires' lists
+# session_state keys that must be set before the page can be drawn.
+PAGES = [
+    {'id': 'login', 'icon': None, 'label': 'Login',
+     'loader': 'login:login', 'requires': ()},
+    {'id': 'onboarding', 'icon': None, 'label': 'Profile Setup',
+     'loader': 'onboarding:onboarding', 'requires': ('onboarding',)},
+    {'id': 'dashboard', 'icon': '🏠', 'label': 'Home',
+     'loader': 'dashboard:dashboard', 'requires': ('logged_in', 'user_data')},
+    {'id': 'log', 'icon': '💧', 'label': 'Sips',
+     'loader': 'water_log:water_log', 'requires': ('logged_in', 'user_data')},
+    {'id': 'progress', 'icon': '📊', 'label': 'Stats',
+     'loader': 'progress:progress', 'requires': ('logged_in', 'user_data')},
+    {'id': 'games', 'icon': '🎮', 'label': 'Games',
+     'loader': 'games:games', 'requires': ('logged_in',)},
+    {'id': 'settings', 'icon': '⚙️', 'label': 'Settings',
+     'loader': 'settings:settings', 'requires': ('logged_in', 'user_data', 'settings')},
+]
+
+PAGES_BY_ID = {page['id']: page for page in PAGES}
+HOME_PAGE = 'dashboard'
+
+_lock = threading.Lock()
+_loaded = {}
+_timings = {}
+
+log = logging.getLogger(__name__)
+
+
+def nav_pages():
+    return [page for page in PAGES if page['icon']]
+
+
+def _has(state, key):
+    """Set and not a placeholder (None/False); an empty dict still counts"""
+    value = state.get(key)
+    return value is not None and value is not False
+
+
+def route(state):
+    """Id of the page to draw for a session's state"""
+    if state.get('onboarding'):
+        return 'onboarding'
+    if not state.get('logged_in'):
+        return 'login'
+
+    page = PAGES_BY_ID.get(state.get('current_page'), PAGES_BY_ID[HOME_PAGE])
+    if not all(_has(state, key) for key in page['requires']):
+        return 'login'
+    return page['id']
+
+
+def get_page(page_id):
+    """The page's render function, importing its module on first use"""
+    page = _loaded.get(page_id)
+    if page is not None:
+        return page
+
+    module_name, function = PAGES_BY_ID[page_id]['loader'].split(':')
+    with _lock:
+        if page_id not in _loaded:
+            _loaded[page_id] = getattr(importlib.import_module(module_name), function)
+    return _loaded[page_id]
+
+
+def _count_bytes():
+    """Wrap this script run's outgoing message queue to count serialized bytes.
+
+    Returns (counter, restore); counter is None when Streamlit's internals
+    aren't available (bare mode or a changed API), so bytes go unrecorded.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+        enqueue = ctx._enqueue
+    except Exception:
+        return None, lambda: None
+
+    counter = [0]
+
+    def counting_enqueue(msg):
+        counter[0] += msg.ByteSize()
+        enqueue(msg)
+
+    ctx._enqueue = counting_enqueue
+
+    def restore():
+        ctx._enqueue = enqueue
+
+    return counter, restore
+
+
+def render(page_id):
+    """Draw a page, recording wall time, DB calls and bytes sent to the browser"""
+    render_page = get_page(page_id)
+
+    counter, restore = _count_bytes()
+    checkouts = database.thread_checkouts()
+    start = time.perf_counter()
+    try:
+        render_page()
+    finally:
+        # st.rerun()/st.stop() end a render with an exception; still count it
+        wall_ms = (time.perf_counter() - start) * 1000
+        restore()
+        _record(page_id, wall_ms, database.thread_checkouts() - checkouts,
+                counter[0] if counter else None)
+
+
+def _record(page_id, wall_ms, db_calls, sent_bytes):
+    with _lock:
+        timing = _timings.setdefault(page_id, {
+            'renders': 0, 'wall_ms': 0.0, 'max_wall_ms': 0.0, 'db_calls': 0, 'bytes': 0,
+        })
+        timing['renders'] += 1
+        timing['wall_ms'] += wall_ms
+        timing['max_wall_ms'] = max(timing['max_wall_ms'], wall_ms)
+        timing['db_calls'] += db_calls
+        timing['bytes'] += sent_bytes or 0
+
+    level = logging.WARNING if wall_ms >= SLOW_PAGE_MS else logging.DEBUG
+    log.log(level, "page=%s wall_ms=%.1f db_calls=%d bytes=%s",
+            page_id, wall_ms, db_calls, sent_bytes if sent_bytes is not None else '?')
+
+
+def page_stats():
+    """Per-page totals and averages of wall time, DB calls and bytes sent"""
+    with _lock:
+        stats = {}
+        for page_id, timing in _timings.items():
+            renders = timing['renders']
+            stats[page_id] = dict(
+                timing,
+                avg_wall_ms=timing['wall_ms'] / renders,
+                avg_db_calls=timing['db_calls'] / renders,
+                avg_bytes=timing['bytes'] / renders,
+            )
+    return stats
+
+
+def loaded_pages():
+    with _lock:
+        return list(_loaded)
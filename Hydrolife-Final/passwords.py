@@ -0,0 +1,139 @@
+"""
+Password hashing for HydroLife
+Salted, tunable KDFs with transparent upgrade of legacy SHA-256 hashes
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PASSWORD_HASHER = os.environ.get("HYDROLIFE_PASSWORD_HASHER", "pbkdf2_sha256")
+PBKDF2_ITERATIONS = int(os.environ.get("HYDROLIFE_PBKDF2_ITERATIONS", 200_000))
+SCRYPT_COST = int(os.environ.get("HYDROLIFE_SCRYPT_COST", 2 ** 14))
+
+# Verification runs on a small fixed pool; at most VERIFY_QUEUE logins may be
+# waiting or running at once, and a login gives up after VERIFY_TIMEOUT.
+VERIFY_WORKERS = int(os.environ.get("HYDROLIFE_VERIFY_WORKERS", 4))
+VERIFY_QUEUE = VERIFY_WORKERS * 8
+VERIFY_TIMEOUT = 10.0
+
+
+class PBKDF2Hasher:
+    """PBKDF2-HMAC-SHA256: pbkdf2_sha256$<iterations>$<salt>$<hash>"""
+
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations=PBKDF2_ITERATIONS):
+        self.iterations = iterations
+
+    def encode(self, password, salt=None):
+        salt = salt or os.urandom(16).hex()
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), self.iterations)
+        return f"{self.algorithm}${self.iterations}${salt}${digest.hex()}"
+
+    def verify(self, password, encoded):
+        _, iterations, salt, digest = encoded.split('$')
+        candidate = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), int(iterations))
+        return hmac.compare_digest(candidate.hex(), digest)
+
+    def needs_rehash(self, encoded):
+        return int(encoded.split('$')[1]) != self.iterations
+
+
+class ScryptHasher:
+    """scrypt (memory-hard): scrypt$<n>$<r>$<p>$<salt>$<hash>"""
+
+    algorithm = 'scrypt'
+
+    def __init__(self, n=SCRYPT_COST, r=8, p=1):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def _derive(self, password, salt, n, r, p):
+        return hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=256 * n * r, dklen=32
+        )
+
+    def encode(self, password, salt=None):
+        salt = salt or os.urandom(16).hex()
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return f"{self.algorithm}${self.n}${self.r}${self.p}${salt}${digest.hex()}"
+
+    def verify(self, password, encoded):
+        _, n, r, p, salt, digest = encoded.split('$')
+        candidate = self._derive(password, salt, int(n), int(r), int(p))
+        return hmac.compare_digest(candidate.hex(), digest)
+
+    def needs_rehash(self, encoded):
+        _, n, r, p, _, _ = encoded.split('$')
+        return (int(n), int(r), int(p)) != (self.n, self.r, self.p)
+
+
+class LegacySHA256Hasher:
+    """Unsalted SHA-256 hex digests from older versions; verify-only"""
+
+    algorithm = 'sha256'
+
+    def encode(self, password, salt=None):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password, encoded):
+        return hmac.compare_digest(self.encode(password), encoded)
+
+    def needs_rehash(self, encoded):
+        return True
+
+
+HASHERS = {
+    PBKDF2Hasher.algorithm: PBKDF2Hasher(),
+    ScryptHasher.algorithm: ScryptHasher(),
+    LegacySHA256Hasher.algorithm: LegacySHA256Hasher(),
+}
+
+
+def get_hasher(encoded=None):
+    """Hasher for a stored hash, or the configured default when ``encoded`` is None"""
+    if encoded is None:
+        return HASHERS[PASSWORD_HASHER]
+    if '$' not in encoded:
+        return HASHERS[LegacySHA256Hasher.algorithm]
+    return HASHERS[encoded.split('$', 1)[0]]
+
+
+def hash_password(password):
+    """Hash a password with the configured hasher and a fresh salt"""
+    return get_hasher().encode(password)
+
+
+def check_password(password, encoded):
+    """Return (matches, needs_rehash) for a stored hash"""
+    hasher = get_hasher(encoded)
+    if not hasher.verify(password, encoded):
+        return False, False
+    default = get_hasher()
+    return True, hasher is not default or default.needs_rehash(encoded)
+
+
+_executor = ThreadPoolExecutor(max_workers=VERIFY_WORKERS, thread_name_prefix="hydrolife-verify")
+_slots = threading.BoundedSemaphore(VERIFY_QUEUE)
+
+
+def check_password_pooled(password, encoded, timeout=VERIFY_TIMEOUT):
+    """check_password() on the bounded verification pool.
+
+    Raises TimeoutError when the pool is saturated or the check takes longer
+    than ``timeout``, so a burst of logins can't pile up behind slow hashes.
+    """
+    if not _slots.acquire(timeout=timeout):
+        raise TimeoutError("Too many logins in progress")
+    try:
+        future = _executor.submit(check_password, password, encoded)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future.result(timeout=timeout)
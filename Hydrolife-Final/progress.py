@@ -1,176 +1,232 @@
+import os
 import streamlit as st
-import matplotlib.pyplot as plt
 import numpy as np
+from database import local_today
+
+import chart_cache
+import stats
+
+# "matplotlib" renders PNGs on the server (cached in chart_cache);
+# "vega" sends just the series and lets the browser draw Vega-Lite charts.
+CHART_BACKEND = os.environ.get("HYDROLIFE_CHART_BACKEND", "matplotlib")
+
+RANGES = {
+    'This week': None,
+    'Last 30 days': 30,
+    'Last 90 days': 90,
+    'Last 365 days': 365,
+}
+
+light_gray = (0, 0, 0, 0.05)
+
+
+def load_series(range_label):
+    """(start, series, labels) for the selected range"""
+    water_data = st.session_state.water_data
+    days = RANGES[range_label]
+
+    if days is None:
+        # Zero-copy over the ring's Mon-Sun slots
+        weekly_hist = water_data['weekly_hist'].advance(local_today(st.session_state.user_data['timezone']))
+        series = np.frombuffer(weekly_hist.view(), dtype=np.intc)
+        return np.datetime64(weekly_hist.monday, 'D'), series, list(stats.WEEKDAYS)
+
+    start, series = stats.daily_series(st.session_state.id_user, days)
+    # Sips still in the write-behind buffer haven't reached daily_totals yet;
+    # the session always has today's real total.
+    series[-1] = water_data['water_intake']
+    return start, series, stats.day_labels(start, days, fmt='%Y-%m-%d')
+
+
+def stat_card(title, value, note, color, note_color='#10b981'):
+    st.markdown(f"""
+    <div style="background: white; padding: 20px; border-radius: 16px;
+                box-shadow: 0 8px 24px rgba(0,0,0,0.1); text-align: center;">
+        <p style="color: #666; font-size: 12px;">{title}</p>
+        <p style="color: {color}; font-size: 28px; font-weight: 700;">{value}</p>
+        <p style="color: {note_color}; font-size: 12px;">{note}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def style_axes(ax, labels):
+    """Shared look; long ranges only label about a dozen ticks"""
+    x_pos = np.arange(len(labels))
+    step = max(len(labels) // 12, 1)
+    ax.set_xticks(x_pos[::step])
+    ax.set_xticklabels(labels[::step], rotation=0 if step == 1 else 30)
+
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_color(light_gray)
+    ax.spines['bottom'].set_color(light_gray)
+
+    ax.tick_params(colors='#999999', labelsize=10)
+    ax.grid(axis='y', alpha=0.05, linestyle='-', linewidth=0.5)
+
+
+def bar_chart(labels, values):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    fig.patch.set_facecolor('white')
+    ax.set_facecolor('white')
+
+    colors_gradient = plt.cm.cool(np.linspace(0.3, 0.9, len(values)))
+    width = 0.6 if len(values) <= 31 else 0.9
+    bars = ax.bar(np.arange(len(values)), values, color=colors_gradient, edgecolor='none', alpha=0.9, width=width)
+    if len(values) <= 14:
+        ax.bar_label(bars, fontsize=10, fontweight='bold', color='#333333')
+
+    style_axes(ax, labels)
+    fig.tight_layout()
+    return fig
+
+
+def trend_chart(labels, values, rolling):
+    import matplotlib.pyplot as plt
+
+    fig2, ax2 = plt.subplots(figsize=(12, 3))
+    fig2.patch.set_facecolor('white')
+    ax2.set_facecolor('white')
+
+    x_pos = np.arange(len(values))
+    markers = len(values) <= 31
+    ax2.plot(x_pos, values, color='#764ba2', linewidth=3 if markers else 1.5,
+             marker='o' if markers else None, markersize=10,
+             markerfacecolor='#764ba2', markeredgecolor='white',
+             markeredgewidth=2, zorder=3)
+    ax2.fill_between(x_pos, values, alpha=0.1, color='#764ba2')
+    if rolling is not None:
+        ax2.plot(x_pos, rolling, color='#00d4ff', linewidth=2.5, label='7-day average', zorder=4)
+        ax2.legend(frameon=False, fontsize=9)
+
+    style_axes(ax2, labels)
+    fig2.tight_layout()
+    return fig2
+
+
+def goal_pie(consumed, water_goal):
+    import matplotlib.pyplot as plt
+
+    water_remaining = max(water_goal - consumed, 0)
+
+    labels = ['Consumed', 'water_remaining']
+    sizes = [consumed, water_remaining]
+
+    if consumed >= water_goal:
+        colors = ['#10b981', '#d1fae5']
+    else:
+        colors = ['#667eea', '#e0e7ff']
+
+    fig_pie, ax_pie = plt.subplots(figsize=(3, 3))
+    fig_pie.patch.set_facecolor('white')
+    ax_pie.pie(
+        sizes,
+        labels=labels,
+        colors=colors,
+        autopct='%1.1f%%',
+        startangle=90,
+        counterclock=False,
+        textprops={'color': '#333333', 'fontsize': 10, 'weight': 'bold'},
+        wedgeprops={'edgecolor': 'white', 'linewidth': 2}
+    )
+    ax_pie.axis('equal')
+    return fig_pie
+
+
+def show_chart(kind, *inputs):
+    """Draw the 'bar', 'trend' or 'pie' chart with the configured backend"""
+    if CHART_BACKEND == "vega":
+        import vega_charts
+
+        specs = {'bar': vega_charts.bar_spec, 'trend': vega_charts.trend_spec, 'pie': vega_charts.pie_spec}
+        st.vega_lite_chart(spec=specs[kind](*inputs), use_container_width=True)
+        return
+
+    charts = {'bar': bar_chart, 'trend': trend_chart, 'pie': goal_pie}
+    st.image(chart_cache.get_chart(kind, charts[kind], *inputs), use_container_width=True)
 
-fig, ax = plt.subplots()
 
 def progress():
     """Progress page with stats and charts"""
     st.markdown('<h1 style="text-align: center; color: white;">Progress & Stats</h1>', unsafe_allow_html=True)
-    
+
     col1, col2, col3 = st.columns([1, 4, 1])
     with col2:
-        weekly_hist = st.session_state.water_data['weekly_hist']
-        whole_week = sum(day['water'] for day in weekly_hist)
-        avg_intake = whole_week / 7
-        high_day = max(weekly_hist, key=lambda x: x['water'])
+        range_label = st.radio("Range", list(RANGES), horizontal=True, key="progress_range",
+                               label_visibility="collapsed")
+        start, series, labels = load_series(range_label)
         water_goal = st.session_state.user_data['water_goal']
-        days_met = sum(1 for day in weekly_hist if day['water'] >= water_goal)
-        consistency = int((days_met / 7) * 100)
-        
+        summary = stats.summarize(series, water_goal, start)
+
+        avg_intake = summary['average']
+        consistency = int(summary['hit_rate'] * 100)
+        total_title = 'whole Week' if RANGES[range_label] is None else 'Total'
+
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
-            st.markdown(f"""
-            <div style="background: white; padding: 20px; border-radius: 16px; 
-                        box-shadow: 0 8px 24px rgba(0,0,0,0.1); text-align: center;">
-                <p style="color: #666; font-size: 12px;">Avg Daily</p>
-                <p style="color: #667eea; font-size: 28px; font-weight: 700;">{int(avg_intake)}ml</p>
-                <p style="color: #10b981; font-size: 12px;">{'✓ Goal' if avg_intake >= water_goal else 'Keep going!'}</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
+            stat_card("Avg Daily", f"{int(avg_intake)}ml",
+                      '✓ Goal' if avg_intake >= water_goal else 'Keep going!', '#667eea')
+
         with col2:
-            st.markdown(f"""
-            <div style="background: white; padding: 20px; border-radius: 16px; 
-                        box-shadow: 0 8px 24px rgba(0,0,0,0.1); text-align: center;">
-                <p style="color: #666; font-size: 12px;">Best Day</p>
-                <p style="color: #764ba2; font-size: 28px; font-weight: 700;">{high_day['water']}ml</p>
-                <p style="color: #666; font-size: 12px;">{high_day['day']}</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
+            stat_card("Best Day", f"{summary['best_value']}ml",
+                      labels[summary['best_index']], '#764ba2', note_color='#666')
+
         with col3:
-            st.markdown(f"""
-            <div style="background: white; padding: 20px; border-radius: 16px; 
-                        box-shadow: 0 8px 24px rgba(0,0,0,0.1); text-align: center;">
-                <p style="color: #666; font-size: 12px;">whole Week</p>
-                <p style="color: #00d4ff; font-size: 28px; font-weight: 700;">{whole_week}ml</p>
-                <p style="color: #10b981; font-size: 12px;">{'Goal met!' if whole_week >= water_goal * 7 else 'Keep going!'}</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
+            stat_card(total_title, f"{summary['total']}ml",
+                      'Goal met!' if summary['total'] >= water_goal * len(series) else 'Keep going!', '#00d4ff')
+
         with col4:
-            st.markdown(f"""
-            <div style="background: white; padding: 20px; border-radius: 16px; 
-                        box-shadow: 0 8px 24px rgba(0,0,0,0.1); text-align: center;">
-                <p style="color: #666; font-size: 12px;">Consistency</p>
-                <p style="color: #f97316; font-size: 28px; font-weight: 700;">{consistency}%</p>
-                <p style="color: #10b981; font-size: 12px;">{'Excellent' if consistency >= 80 else 'Keep it up!'}</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
+            stat_card("Consistency", f"{consistency}%",
+                      'Excellent' if consistency >= 80 else 'Keep it up!', '#f97316')
+
+        st.markdown("<br>", unsafe_allow_html=True)
+
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            stat_card("Longest Streak", f"{summary['longest_streak']}d", 'days at goal', '#10b981', note_color='#666')
+
+        with col2:
+            stat_card("Median Day", f"{int(summary['median'])}ml", 'half of days above', '#667eea', note_color='#666')
+
+        with col3:
+            stat_card("Top 10% Days", f"{int(summary['p90'])}ml+", '90th percentile', '#764ba2', note_color='#666')
+
+        with col4:
+            stat_card("Best Weekday", summary['best_weekday'],
+                      f"{int(summary['seasonality'].max())}ml avg", '#00d4ff', note_color='#666')
+
         st.markdown("<br>", unsafe_allow_html=True)
 
         st.markdown('<div style="background: white; padding: 4px; border-radius: 24px; box-shadow: 0 10px 40px rgba(0,0,0,0.15);">', unsafe_allow_html=True)
         st.markdown('<h3 style="color: white; margin-bottom: 24px;">Daily Water Intake</h3>', unsafe_allow_html=True)
-        
-        days = [d['day'] for d in weekly_hist]
-        waters = [d['water'] for d in weekly_hist]
 
-        fig, ax = plt.subplots()
-        fig.patch.set_facecolor('white')
-        ax.set_facecolor('white')
+        show_chart('bar', labels, series)
 
-        colors_gradient = plt.cm.cool(np.linspace(0.3, 0.9, len(waters)))
-        bars = ax.bar(days, waters, color=colors_gradient, edgecolor='none', alpha=0.9, width=0.6)
-        
-        for bar, value in zip(bars, waters):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{value}', ha='center', va='bottom',
-                    fontsize=10, fontweight='bold', color='#333333')
-        
-        light_gray = (0, 0, 0, 0.05)
-        
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_color(light_gray)
-        ax.spines['bottom'].set_color(light_gray)
-        
-        ax.tick_params(colors='#999999', labelsize=10)
-        ax.grid(axis='y', alpha=0.05, linestyle='-', linewidth=0.5)
-        
-        plt.tight_layout()
-        st.pyplot(fig, use_container_width=True)
-        plt.close(fig)
-        
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown("<br>", unsafe_allow_html=True)
 
         st.markdown('<div style="background: white; padding: 4px; border-radius: 24px; box-shadow: 0 10px 40px rgba(0,0,0,0.15);">', unsafe_allow_html=True)
         st.markdown('<h3 style="color: white; margin-bottom: 24px;">Hydration Trend</h3>', unsafe_allow_html=True)
-        
-        fig2, ax2 = plt.subplots(figsize=(12, 3))
-        fig2.patch.set_facecolor('white')
-        ax2.set_facecolor('white')
-        
-        x_pos = np.arange(len(days))
-        ax2.plot(x_pos, waters, color='#764ba2', linewidth=3, marker='o', 
-                 markersize=10, markerfacecolor='#764ba2', markeredgecolor='white', 
-                 markeredgewidth=2, zorder=3)
-        
-        ax2.fill_between(x_pos, waters, alpha=0.1, color='#764ba2')
-        ax2.set_xticks(x_pos)
-        ax2.set_xticklabels(days)
-        
-        ax2.spines['top'].set_visible(False)
-        ax2.spines['right'].set_visible(False)
-        ax2.spines['left'].set_color(light_gray)
-        ax2.spines['bottom'].set_color(light_gray)
-        
-        ax2.tick_params(colors='#999999', labelsize=10)
-        ax2.grid(axis='y', alpha=0.05, linestyle='-', linewidth=0.5)
-        
-        plt.tight_layout()
-        st.pyplot(fig2, use_container_width=True)
-        plt.close(fig2)
-        
+
+        rolling = stats.rolling_mean(series, 7) if RANGES[range_label] else None
+        show_chart('trend', labels, series, rolling)
+
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown('<div style="background: white; padding: 4px; border-radius: 24px; box-shadow: 0 10px 40px rgba(0,0,0,0.15);">', unsafe_allow_html=True)
         st.markdown('<h3 style="color: white; margin-bottom: 24px;">Daily Intake vs Goal</h3>', unsafe_allow_html=True)
 
-        options_day = [d['day'] for d in weekly_hist]
-        day_selected = st.selectbox("Select a day:", options_day, index=len(options_day)-1, key="day_select_pie")
+        day_index = st.selectbox("Select a day:", range(len(labels)), index=len(labels)-1,
+                                 format_func=labels.__getitem__, key=f"day_select_pie_{range_label}")
+        day_selected = labels[day_index]
+        today_water = int(series[day_index])
 
-        day_data = next(d for d in weekly_hist if d['day'] == day_selected)
-        today_water = day_data['water']
-        water_goal = st.session_state.user_data['water_goal']
+        show_chart('pie', today_water, water_goal)
 
-        water_remaining = max(water_goal - today_water, 0)
-
-        labels = ['Consumed', 'water_remaining']
-        sizes = [today_water, water_remaining]
-
-       
-        if today_water >= water_goal:
-            colors = ['#10b981', '#d1fae5'] 
-        else:
-            colors = ['#667eea', '#e0e7ff']  
-
-        
-        fig_pie, ax_pie = plt.subplots(figsize=(3, 3))
-        fig_pie.patch.set_facecolor('white')
-        wedges, texts, autotexts = ax_pie.pie(
-            sizes,
-            labels=labels,
-            colors=colors,
-            autopct='%1.1f%%',
-            startangle=90,
-            counterclock=False,
-            textprops={'color': '#333333', 'fontsize': 10, 'weight': 'bold'},
-            wedgeprops={'edgecolor': 'white', 'linewidth': 2}
-        )
-
-        
-        ax_pie.axis('equal')
-
-        
-        st.pyplot(fig_pie, use_container_width=True)
-        plt.close(fig_pie)
-
-        
         st.markdown(f"""
         <p style="text-align:center; color:#555; font-size:14px;">
         <b>{day_selected}'s Intake:</b> {today_water} ml / {water_goal} ml
@@ -0,0 +1,175 @@
+"""
+Reminder scheduler for HydroLife
+One background thread serves every user's reminders from a heap of
+(next_fire, id_user) timers, sleeping until the earliest one is due
+"""
+
+import heapq
+import logging
+import threading
+import time
+
+import database
+
+log = logging.getLogger(__name__)
+
+
+def desktop_notify(id_user):
+    """Default notifier: a desktop notification through plyer"""
+    from plyer import notification
+
+    notification.notify(
+        title="💧 Water Reminder",
+        message="Time to drink water!",
+        timeout=5
+    )
+
+
+class ReminderScheduler:
+    """Heap-based timer queue with add/update/cancel.
+
+    ``_jobs`` holds the live (interval, next_fire) per user. Updating or
+    cancelling a reminder doesn't search the heap; the old heap entry no
+    longer matches ``_jobs`` and is skipped when it surfaces.
+    """
+
+    def __init__(self, notify=desktop_notify, clock=time.monotonic):
+        self.notify = notify
+        self.clock = clock
+        self._heap = []
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._fired = 0
+
+    def set(self, id_user, interval_minutes):
+        """Add or reschedule a user's reminder; a non-positive interval cancels it"""
+        if not interval_minutes or interval_minutes <= 0:
+            self.cancel(id_user)
+            return
+
+        interval = interval_minutes * 60
+        with self._cond:
+            next_fire = self.clock() + interval
+            self._jobs[id_user] = (interval, next_fire)
+            heapq.heappush(self._heap, (next_fire, id_user))
+            self._compact()
+            self._cond.notify()
+
+    def cancel(self, id_user):
+        with self._cond:
+            if self._jobs.pop(id_user, None) is not None:
+                self._compact()
+                self._cond.notify()
+
+    def _compact(self):
+        # Stale entries pile up when reminders change often; rebuild the heap
+        # once they outnumber the live ones
+        if len(self._heap) > 2 * len(self._jobs) + 64:
+            self._heap = [(next_fire, id_user) for id_user, (_, next_fire) in self._jobs.items()]
+            heapq.heapify(self._heap)
+
+    def _next_due(self):
+        """Block until reminders are due; returns their users, or None once stopped"""
+        with self._cond:
+            while not self._stopped:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                now = self.clock()
+                next_fire = self._heap[0][0]
+                if next_fire > now:
+                    self._cond.wait(next_fire - now)
+                    continue
+
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    next_fire, id_user = heapq.heappop(self._heap)
+                    job = self._jobs.get(id_user)
+                    if job is None or job[1] != next_fire:
+                        continue
+                    interval = job[0]
+                    # After a long stall, skip missed reminders rather than burst them
+                    following = next_fire + interval
+                    if following <= now:
+                        following = now + interval
+                    self._jobs[id_user] = (interval, following)
+                    heapq.heappush(self._heap, (following, id_user))
+                    due.append(id_user)
+                if due:
+                    return due
+            return None
+
+    def _run(self):
+        while True:
+            due = self._next_due()
+            if due is None:
+                return
+            for id_user in due:
+                try:
+                    self.notify(id_user)
+                except Exception:
+                    log.exception("Reminder for user %s failed", id_user)
+                with self._cond:
+                    self._fired += 1
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="hydrolife-reminders", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'scheduled': len(self._jobs),
+                'heap': len(self._heap),
+                'fired': self._fired,
+                'running': self._thread is not None,
+            }
+
+
+_scheduler = ReminderScheduler()
+_start_lock = threading.Lock()
+_loaded = False
+
+
+def start():
+    """Load every user's reminder settings and start the service (once per process)"""
+    global _loaded
+    with _start_lock:
+        if not _loaded:
+            for id_user, notification, interval in database.get_reminder_settings():
+                if notification:
+                    _scheduler.set(id_user, interval)
+            _loaded = True
+    _scheduler.start()
+
+
+def update(id_user, settings):
+    """Apply a user's saved reminder settings to the running service"""
+    if settings.get('notification'):
+        _scheduler.set(id_user, settings.get('reminder_interval_user'))
+    else:
+        _scheduler.cancel(id_user)
+
+
+def cancel(id_user):
+    _scheduler.cancel(id_user)
+
+
+def scheduler_stats():
+    """Counters: scheduled reminders, heap entries, reminders fired, running"""
+    return _scheduler.stats()
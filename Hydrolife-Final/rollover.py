@@ -0,0 +1,91 @@
+"""
+Midnight day rollover for HydroLife
+One background job starts the new day for every user just after their
+local midnight, in chunked set-based transactions, so nothing is rolled
+over while a page renders
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import database
+
+CHUNK_SIZE = int(os.environ.get("HYDROLIFE_ROLLOVER_CHUNK", 500))
+
+# Wake a little after midnight so the new local date is certain
+MIDNIGHT_GRACE = 5
+# How long to wait before retrying after a failed run
+RETRY_DELAY = 60
+
+log = logging.getLogger(__name__)
+
+
+def run_rollover(now=None, chunk_size=CHUNK_SIZE):
+    """Roll every timezone's users over to their local today.
+
+    Each chunk is its own transaction, and users already on today are
+    skipped, so an interrupted or repeated run is safe to start again.
+    Returns {timezone: users rolled over}.
+    """
+    rolled = {}
+    for timezone in database.user_timezones():
+        if timezone and database.zone(timezone) is None:
+            log.warning("Unknown timezone %r; rolling those users over on server time", timezone)
+        today = database.local_today(timezone, now)
+        after, count = 0, 0
+        while True:
+            after, changed = database.roll_over_users(timezone, today, after, chunk_size)
+            if after is None:
+                break
+            count += changed
+        rolled[timezone] = count
+        log.info("Rolled over %d users in %s to %s", count, timezone or 'server time', today)
+    return rolled
+
+
+def seconds_until_midnight(now=None):
+    """Seconds until just after the next local midnight in any timezone users are on"""
+    waits = []
+    for timezone in database.user_timezones() or [None]:
+        local = database.local_now(timezone, now)
+        midnight = datetime.combine(local.date() + timedelta(days=1), datetime.min.time(), local.tzinfo)
+        waits.append(midnight.timestamp() - local.timestamp())
+    return min(waits) + MIDNIGHT_GRACE
+
+
+_stop = threading.Event()
+_start_lock = threading.Lock()
+_thread = None
+
+
+def _run():
+    while not _stop.is_set():
+        try:
+            run_rollover()
+            wait = seconds_until_midnight()
+        except Exception:
+            # Keep the thread alive; a missed day is caught up on the next run
+            log.exception("Day rollover failed")
+            wait = RETRY_DELAY
+        _stop.wait(wait)
+
+
+def start():
+    """Start the rollover thread (once per process); it catches up on missed days first"""
+    global _thread
+    with _start_lock:
+        if _thread is None:
+            _stop.clear()
+            _thread = threading.Thread(target=_run, name="hydrolife-rollover", daemon=True)
+            _thread.start()
+
+
+def stop():
+    global _thread
+    with _start_lock:
+        thread, _thread = _thread, None
+    _stop.set()
+    if thread is not None:
+        thread.join()
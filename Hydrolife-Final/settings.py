@@ -2,8 +2,14 @@
 Settings page
 """
 import streamlit as st
-from database import update_water_settings, update_remainder, reset_water_intake, update_water_intake
-from datetime import datetime
+from zoneinfo import available_timezones
+from database import local_today, reset_water_intake
+import async_db
+import intake_buffer
+import user_cache
+
+# None keeps the user on the server's local time
+TIMEZONES = [None] + sorted(available_timezones())
 
 
 def settings():
@@ -28,11 +34,24 @@ def settings():
         
         name = st.text_input("Full Name", value=st.session_state.user_data['name'])
         age = st.number_input("Age", min_value=1, max_value=150, value=int(st.session_state.user_data['age']))
+        current_timezone = st.session_state.user_data['timezone']
+        timezone = st.selectbox(
+            "Time Zone",
+            options=TIMEZONES,
+            index=TIMEZONES.index(current_timezone) if current_timezone in TIMEZONES else 0,
+            format_func=lambda tz: tz or "Server time",
+            help="Your day, streak and history start at midnight in this time zone"
+        )
         
         if st.button("Save Changes", use_container_width=True, type="primary"):
             st.session_state.user_data['name'] = name
             st.session_state.user_data['age'] = str(age)
-            update_water_settings(st.session_state.id_user, name, age, st.session_state.user_data['water_goal'])
+            async_db.write_nowait(user_cache.update_settings, st.session_state.id_user, name, age,
+                                  st.session_state.user_data['water_goal'])
+            if timezone != current_timezone:
+                intake_buffer.flush(st.session_state.id_user)
+                st.session_state.user_data['timezone'] = timezone
+                async_db.write_nowait(user_cache.update_timezone, st.session_state.id_user, timezone)
             st.success("Profile updated! ✓")
         
         st.markdown("<br>", unsafe_allow_html=True)
@@ -62,9 +81,10 @@ def settings():
         st.info(f"💡 Recommended: {st.session_state.user_data['water_goal']}ml per day")
         
         if st.button("Update Goal", use_container_width=True):
+            intake_buffer.flush(st.session_state.id_user)
             st.session_state.user_data['water_goal'] = water_goal
-            update_water_settings(st.session_state.id_user, st.session_state.user_data['name'], 
-                              int(st.session_state.user_data['age']), water_goal)
+            async_db.write_nowait(user_cache.update_settings, st.session_state.id_user,
+                                  st.session_state.user_data['name'], int(st.session_state.user_data['age']), water_goal)
             st.success("Daily goal updated! ✓")
         
         st.markdown("<br>", unsafe_allow_html=True)
@@ -88,6 +108,7 @@ def settings():
             value=st.session_state.settings['notification']
         )
         
+        reminder_interval_user = st.session_state.settings['reminder_interval_user']
         if notification:
             reminder_interval_user = st.selectbox(
                 "Reminder Interval",
@@ -95,10 +116,12 @@ def settings():
                 format_func=lambda x: f"Every {x} minutes" if x < 60 else f"Every {x//60} hour{'s' if x > 60 else ''}",
                 index=[30, 60, 90, 120, 180].index(st.session_state.settings['reminder_interval_user'])
             )
-            
-            st.session_state.settings['notification'] = notification
-            st.session_state.settings['reminder_interval_user'] = reminder_interval_user
-            update_remainder(st.session_state.id_user, st.session_state.settings)
+        
+        # Only write when the user actually changed something
+        new_settings = {'notification': notification, 'reminder_interval_user': reminder_interval_user}
+        if new_settings != st.session_state.settings:
+            st.session_state.settings = new_settings
+            async_db.write_nowait(user_cache.update_reminder, st.session_state.id_user, dict(new_settings))
         
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -112,6 +135,8 @@ def settings():
         st.markdown("<br>", unsafe_allow_html=True)
         
         if st.button("🚪 Log Out", use_container_width=True, type="secondary"):
+            intake_buffer.flush(st.session_state.id_user)
+            async_db.wait_for_writes(timeout=5)
             
             st.session_state.logged_in = False
             st.session_state.id_user = None
@@ -122,6 +147,8 @@ def settings():
                 del st.session_state.water_data
             if 'settings' in st.session_state:
                 del st.session_state.settings
+            if 'celebrated_on' in st.session_state:
+                del st.session_state.celebrated_on
             
             st.success("Logged out successfully!")
             st.rerun()
@@ -136,12 +163,10 @@ def settings():
         """, unsafe_allow_html=True)
 
         if st.button("Reset Today's Water Intake", use_container_width=True, type="secondary"):
+            intake_buffer.flush(st.session_state.id_user)
             reset_water_intake(st.session_state.id_user)
+            user_cache.invalidate(st.session_state.id_user)
             st.session_state.water_data['water_intake'] = 0
-            today = datetime.now().strftime('%a')  # 'Mon', 'Tue', etc.
-            for day in st.session_state.water_data['weekly_hist']:
-                if day['day'] == today:
-                    day['water'] = 0
-            update_water_intake(st.session_state.id_user, st.session_state.water_data)
+            st.session_state.water_data['weekly_hist'].set(local_today(st.session_state.user_data['timezone']), 0)
             st.success("Today's water intake has been cleared! 💧")
             st.rerun()
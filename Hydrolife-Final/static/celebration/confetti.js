@@ -0,0 +1,111 @@
+// Small canvas confetti, bundled so the celebration needs no CDN.
+// confetti(options) understands the options the celebration page uses:
+// particleCount, angle, spread, startVelocity, decay, gravity, ticks,
+// origin {x, y}, colors, shapes ('square' | 'circle' | 'star'), scalar, zIndex.
+(function () {
+    const DEFAULTS = {
+        particleCount: 50,
+        angle: 90,
+        spread: 45,
+        startVelocity: 45,
+        decay: 0.9,
+        gravity: 1,
+        ticks: 200,
+        origin: { x: 0.5, y: 0.5 },
+        colors: ['#26ccff', '#a25afd', '#ff5e7e', '#88ff5a', '#fcff42', '#ffa62d', '#ff36ff'],
+        shapes: ['square', 'circle'],
+        scalar: 1,
+        zIndex: 100
+    };
+
+    let canvas = null;
+    let context = null;
+    let particles = [];
+    let frame = null;
+
+    function ensureCanvas(zIndex) {
+        if (!canvas) {
+            canvas = document.createElement('canvas');
+            canvas.style.cssText = 'position:fixed;top:0;left:0;width:100%;height:100%;pointer-events:none;';
+            document.body.appendChild(canvas);
+            context = canvas.getContext('2d');
+        }
+        canvas.style.zIndex = zIndex;
+        canvas.width = window.innerWidth;
+        canvas.height = window.innerHeight;
+    }
+
+    function drawStar(x, y, radius) {
+        context.beginPath();
+        for (let i = 0; i < 10; i++) {
+            const r = i % 2 ? radius / 2 : radius;
+            const a = Math.PI / 2 + i * Math.PI / 5;
+            context.lineTo(x + r * Math.cos(a), y - r * Math.sin(a));
+        }
+        context.closePath();
+        context.fill();
+    }
+
+    function draw(p) {
+        const size = 6 * p.scalar;
+        context.globalAlpha = 1 - p.tick / p.ticks;
+        context.fillStyle = p.color;
+        if (p.shape === 'circle') {
+            context.beginPath();
+            context.ellipse(p.x, p.y, size / 2, size / 2 * Math.abs(Math.cos(p.wobble)), 0, 0, 2 * Math.PI);
+            context.fill();
+        } else if (p.shape === 'star') {
+            drawStar(p.x, p.y, size);
+        } else {
+            context.save();
+            context.translate(p.x, p.y);
+            context.rotate(p.wobble);
+            context.fillRect(-size / 2, -size / 4, size, size / 2);
+            context.restore();
+        }
+    }
+
+    function step() {
+        context.clearRect(0, 0, canvas.width, canvas.height);
+        particles = particles.filter(p => p.tick < p.ticks);
+        for (const p of particles) {
+            p.x += Math.cos(p.angle) * p.velocity;
+            p.y += Math.sin(p.angle) * p.velocity + p.gravity * 3;
+            p.velocity *= p.decay;
+            p.wobble += 0.1;
+            p.tick += 1;
+            draw(p);
+        }
+        context.globalAlpha = 1;
+        frame = particles.length ? requestAnimationFrame(step) : null;
+    }
+
+    window.confetti = function (options) {
+        const o = Object.assign({}, DEFAULTS, options);
+        const origin = Object.assign({}, DEFAULTS.origin, o.origin);
+        ensureCanvas(o.zIndex);
+
+        const radians = o.angle * Math.PI / 180;
+        const spread = o.spread * Math.PI / 180;
+        for (let i = 0; i < Math.floor(o.particleCount); i++) {
+            particles.push({
+                x: origin.x * canvas.width,
+                y: origin.y * canvas.height,
+                // Canvas y grows downwards, so an upward angle is negative
+                angle: -radians + (Math.random() - 0.5) * spread,
+                velocity: o.startVelocity * (0.5 + Math.random() * 0.5),
+                decay: o.decay,
+                gravity: o.gravity,
+                ticks: o.ticks,
+                tick: 0,
+                wobble: Math.random() * 10,
+                scalar: o.scalar,
+                color: o.colors[Math.floor(Math.random() * o.colors.length)],
+                shape: o.shapes[Math.floor(Math.random() * o.shapes.length)]
+            });
+        }
+        if (!frame) {
+            frame = requestAnimationFrame(step);
+        }
+    };
+})();
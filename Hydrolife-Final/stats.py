@@ -0,0 +1,108 @@
+"""
+Progress statistics for HydroLife
+Vectorized (NumPy) analytics over contiguous arrays of daily totals
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+import database
+from week_ring import WEEKDAYS
+
+
+def daily_series(id_user, days, today=None):
+    """Daily totals for the ``days`` days ending today (the user's local date).
+
+    Returns (start, series): start is a numpy datetime64[D] and series a
+    contiguous int64 array with one slot per day (0 for days with no log).
+    """
+    with database.connection() as conn:
+        today = today or database.local_today(database.user_timezone(conn.cursor(), id_user))
+        start = today - timedelta(days=days - 1)
+        rows = conn.execute('''
+            SELECT day, total_ml FROM daily_totals
+            WHERE id_user = ? AND day >= ? AND day <= ?
+        ''', (id_user, str(start), str(today))).fetchall()
+
+    start = np.datetime64(start, 'D')
+    series = np.zeros(days, dtype=np.int64)
+    if rows:
+        day_strings, totals = zip(*rows)
+        offsets = (np.array(day_strings, dtype='datetime64[D]') - start).astype(np.int64)
+        series[offsets] = totals
+    return start, series
+
+
+def day_labels(start, length, fmt='%a'):
+    """Labels for each slot of a series: weekday names or dates"""
+    days = start + np.arange(length)
+    if fmt == '%a':
+        return [WEEKDAYS[i] for i in weekday_index(start, length)]
+    return np.datetime_as_string(days, unit='D').tolist()
+
+
+def weekday_index(start, length):
+    """Weekday (Mon=0) of every slot; 1970-01-01 was a Thursday"""
+    first = (start.astype(np.int64) + 3) % 7
+    return (first + np.arange(length)) % 7
+
+
+def rolling_mean(series, window=7):
+    """Trailing mean; the first window-1 slots average what is available"""
+    if len(series) == 0:
+        return np.zeros(0)
+    window = min(window, len(series))
+    csum = np.cumsum(np.concatenate(([0.0], series.astype(np.float64))))
+    full = (csum[window:] - csum[:-window]) / window
+    partial = csum[1:window] / np.arange(1, window)
+    return np.concatenate((partial, full))
+
+
+def percentiles(series, qs=(50, 90)):
+    if len(series) == 0:
+        return {q: 0.0 for q in qs}
+    return dict(zip(qs, np.percentile(series, qs)))
+
+
+def goal_hit_rate(series, goal):
+    """Fraction of days on which the goal was reached"""
+    if len(series) == 0:
+        return 0.0
+    return float(np.mean(series >= goal))
+
+
+def longest_streak(series, goal):
+    """Longest run of consecutive goal-met days"""
+    hits = np.concatenate(([0], (series >= goal).astype(np.int8), [0]))
+    edges = np.diff(hits)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max()) if starts.size else 0
+
+
+def weekday_seasonality(series, start):
+    """Average intake per weekday, Mon..Sun"""
+    index = weekday_index(start, len(series))
+    sums = np.bincount(index, weights=series, minlength=7)
+    counts = np.bincount(index, minlength=7)
+    return sums / np.maximum(counts, 1)
+
+
+def summarize(series, goal, start):
+    """Everything the Progress page shows, computed in one pass of array ops"""
+    best = int(np.argmax(series)) if len(series) else 0
+    pcts = percentiles(series)
+    seasonality = weekday_seasonality(series, start)
+    return {
+        'total': int(series.sum()),
+        'average': float(series.mean()) if len(series) else 0.0,
+        'best_index': best,
+        'best_value': int(series[best]) if len(series) else 0,
+        'hit_rate': goal_hit_rate(series, goal),
+        'longest_streak': longest_streak(series, goal),
+        'median': float(pcts[50]),
+        'p90': float(pcts[90]),
+        'seasonality': seasonality,
+        'best_weekday': WEEKDAYS[int(np.argmax(seasonality))],
+    }
@@ -0,0 +1,128 @@
+"""
+User state cache for HydroLife
+Keeps each user's decoded snapshot in memory so reruns don't hit the database.
+Snapshots can be partial: callers ask for the fields they show.
+"""
+
+import copy
+import os
+import threading
+from collections import OrderedDict
+
+import reminder_scheduler
+from database import (DAY_FIELDS, USER_FIELDS, load_user, local_today, update_remainder,
+                      update_user_timezone, update_water_settings)
+
+MAX_USERS = int(os.environ.get("HYDROLIFE_USER_CACHE_SIZE", 1000))
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+# Bumped by invalidate(); a load that started before a bump must not be
+# cached, or a settings write that lands mid-load would be lost until the
+# next day. One small int per user ever invalidated in this process.
+_generations = {}
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'stale_loads': 0,
+    'evictions': 0,
+    'invalidations': 0,
+}
+
+
+def get_user(id_user, fields=None):
+    """Return a copy of the user's snapshot with at least ``fields`` (default: all) loaded.
+
+    Fields the cached snapshot lacks are fetched with a projection and merged
+    in. A snapshot taken before the user's local midnight also has its
+    DAY_FIELDS reloaded. The timezone is always part of the snapshot, since
+    that check needs it.
+    """
+    fields = list(fields or USER_FIELDS)
+    if 'timezone' not in fields:
+        fields.append('timezone')
+    with _lock:
+        entry = _entries.get(id_user)
+        if entry is None:
+            missing = fields
+        else:
+            loaded = {field for group in entry.values() for field in group}
+            missing = [field for field in fields if field not in loaded]
+            if entry['water_data']['yesterday'] != str(local_today(entry['user_data']['timezone'])):
+                missing += [field for field in DAY_FIELDS
+                            if field in loaded and field not in missing]
+            if not missing:
+                _entries.move_to_end(id_user)
+                _stats['hits'] += 1
+                return copy.deepcopy(entry)
+        _stats['misses'] += 1
+        generation = _generations.get(id_user, 0)
+
+    record = load_user(id_user, missing)
+    if record is None:
+        return None
+    data = record.to_userdata()
+    with _lock:
+        entry = _entries.get(id_user)
+        if _generations.get(id_user, 0) != generation:
+            _stats['stale_loads'] += 1
+        elif entry is not None or missing == fields:
+            if entry is not None:
+                for group, values in data.items():
+                    entry[group].update(values)
+                data = entry
+            _entries[id_user] = data
+            _entries.move_to_end(id_user)
+            while len(_entries) > MAX_USERS:
+                _entries.popitem(last=False)
+                _stats['evictions'] += 1
+            return copy.deepcopy(data)
+
+    # The snapshot it would merge into was invalidated or evicted meanwhile:
+    # answer from a load of everything asked for and leave the cache alone
+    record = load_user(id_user, fields)
+    return record.to_userdata() if record else None
+
+
+def set_water_data(id_user, water_data):
+    """Replace the cached water_data after a change that is persisted elsewhere
+    (sips go through intake_buffer), so the next rerun sees it without a reload.
+    Fields the session never loaded are dropped and fetched fresh when asked for."""
+    with _lock:
+        entry = _entries.get(id_user)
+        if entry is not None:
+            entry['water_data'] = copy.deepcopy(water_data)
+
+
+def update_settings(id_user, name, age, water_goal):
+    """Save profile/goal changes and drop the stale snapshot"""
+    update_water_settings(id_user, name, age, water_goal)
+    invalidate(id_user)
+
+
+def update_reminder(id_user, settings):
+    """Save reminder settings, reschedule the user's reminder and drop the stale snapshot"""
+    update_remainder(id_user, settings)
+    reminder_scheduler.update(id_user, settings)
+    invalidate(id_user)
+
+
+def update_timezone(id_user, timezone):
+    """Save the user's timezone and drop the stale snapshot"""
+    update_user_timezone(id_user, timezone)
+    invalidate(id_user)
+
+
+def invalidate(id_user):
+    with _lock:
+        _generations[id_user] = _generations.get(id_user, 0) + 1
+        if _entries.pop(id_user, None) is not None:
+            _stats['invalidations'] += 1
+
+
+def cache_stats():
+    """Counters: hits, misses, stale loads, evictions, invalidations and cached users"""
+    with _lock:
+        stats = dict(_stats)
+        stats['cached_users'] = len(_entries)
+    return stats
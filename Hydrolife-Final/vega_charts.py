@@ -0,0 +1,99 @@
+"""
+Vega-Lite chart specs for the Progress page
+Only the data series goes to the browser; rendering happens client-side
+"""
+
+AXIS = {'labelColor': '#999999', 'domainColor': '#0000000d', 'gridOpacity': 0.05, 'title': None}
+
+
+def _days(labels, values, **columns):
+    rows = [{'day': day, 'water': int(water)} for day, water in zip(labels, values)]
+    for name, column in columns.items():
+        for row, value in zip(rows, column):
+            row[name] = round(float(value), 1)
+    return rows
+
+
+def _x(labels):
+    # Keep the page's order (Mon..Sun or oldest..newest) instead of sorting
+    return {'field': 'day', 'type': 'ordinal', 'sort': None,
+            'axis': dict(AXIS, labelAngle=0 if len(labels) <= 14 else -30,
+                         labelOverlap=True)}
+
+
+def bar_spec(labels, values):
+    bars = {
+        'mark': {'type': 'bar', 'cornerRadiusEnd': 4, 'opacity': 0.9},
+        'encoding': {
+            'x': _x(labels),
+            'y': {'field': 'water', 'type': 'quantitative', 'axis': AXIS},
+            'color': {'field': 'water', 'type': 'quantitative', 'legend': None,
+                      'scale': {'range': ['#667eea', '#00d4ff']}},
+            'tooltip': [{'field': 'day'}, {'field': 'water', 'title': 'ml'}],
+        },
+    }
+    layers = [bars]
+    if len(labels) <= 14:
+        layers.append({
+            'mark': {'type': 'text', 'dy': -8, 'fontWeight': 'bold', 'color': '#333333'},
+            'encoding': {'x': _x(labels), 'y': {'field': 'water', 'type': 'quantitative'},
+                         'text': {'field': 'water'}},
+        })
+    return {
+        'data': {'values': _days(labels, values)},
+        'layer': layers,
+        'height': 300,
+        'config': {'view': {'stroke': None}},
+    }
+
+
+def trend_spec(labels, values, rolling=None):
+    markers = len(labels) <= 31
+    layers = [
+        {'mark': {'type': 'area', 'color': '#764ba2', 'opacity': 0.1},
+         'encoding': {'x': _x(labels), 'y': {'field': 'water', 'type': 'quantitative', 'axis': AXIS}}},
+        {'mark': {'type': 'line', 'color': '#764ba2', 'strokeWidth': 3 if markers else 1.5,
+                  'point': {'filled': True, 'size': 80, 'color': '#764ba2'} if markers else False},
+         'encoding': {'x': _x(labels), 'y': {'field': 'water', 'type': 'quantitative'},
+                      'tooltip': [{'field': 'day'}, {'field': 'water', 'title': 'ml'}]}},
+    ]
+    columns = {}
+    if rolling is not None:
+        columns['average'] = rolling
+        layers.append(
+            {'mark': {'type': 'line', 'color': '#00d4ff', 'strokeWidth': 2.5},
+             'encoding': {'x': _x(labels), 'y': {'field': 'average', 'type': 'quantitative'},
+                          'tooltip': [{'field': 'day'}, {'field': 'average', 'title': '7-day average'}]}}
+        )
+    return {
+        'data': {'values': _days(labels, values, **columns)},
+        'layer': layers,
+        'height': 250,
+        'config': {'view': {'stroke': None}},
+    }
+
+
+def pie_spec(consumed, water_goal):
+    water_remaining = max(water_goal - consumed, 0)
+    if consumed >= water_goal:
+        colors = ['#10b981', '#d1fae5']
+    else:
+        colors = ['#667eea', '#e0e7ff']
+
+    return {
+        'data': {'values': [
+            {'part': 'Consumed', 'ml': int(consumed)},
+            {'part': 'water_remaining', 'ml': int(water_remaining)},
+        ]},
+        'mark': {'type': 'arc', 'stroke': 'white', 'strokeWidth': 2},
+        'encoding': {
+            'theta': {'field': 'ml', 'type': 'quantitative'},
+            'color': {'field': 'part', 'type': 'nominal', 'sort': None,
+                      'scale': {'domain': ['Consumed', 'water_remaining'], 'range': colors},
+                      'legend': {'orient': 'bottom', 'title': None}},
+            'order': {'field': 'part', 'sort': 'ascending'},
+            'tooltip': [{'field': 'part'}, {'field': 'ml'}],
+        },
+        'height': 260,
+        'config': {'view': {'stroke': None}},
+    }
@@ -3,30 +3,23 @@ Water Logging Page
 """
 
 import streamlit as st
-from datetime import datetime
-from database import update_water_intake
+from database import local_today
+import intake_buffer
+import media
+import user_cache
 
 
 def play_drink_sound():
-    try:
-        audio_file = open("drink.mp3", "rb").read()
-        st.audio(audio_file, format="audio/mp3", start_time=0)
-    except:
-        pass 
+    drink = media.sound("drink")
+    if drink:
+        data, audio_format = drink
+        st.audio(data, format=audio_format, start_time=0)
 
 
 def daily_tip():
-    tips_list = [
-        "Drinking water can boost your metabolism by up to 30%.",
-        "A glass of water before meals can help with digestion.",
-        "Staying hydrated improves concentration and mood.",
-        "Dehydration can cause headaches—drink up regularly!",
-        "Aim to drink at least 8 cups (about 2 liters) of water a day.",
-        "Carry a reusable water bottle to make tracking your intake easy."
-    ]
-
-    import random
-    tip = random.choice(tips_list)
+    tip = media.random_tip()
+    if not tip:
+        return
 
     st.markdown(f"""
         <div style="background: white; border-radius: 16px; padding: 24px; 
@@ -103,15 +96,16 @@ def water_log():
 
              
                 st.session_state.water_data['water_intake'] += user_amount
-                st.session_state.water_data['whole_sips'] += 1
+                # whole_sips is only loaded once the dashboard has been shown
+                if 'whole_sips' in st.session_state.water_data:
+                    st.session_state.water_data['whole_sips'] += 1
 
                 
-                today = datetime.now().strftime("%a")
-                for day in st.session_state.water_data['weekly_hist']:
-                    if day["day"] == today:
-                        day["water"] = st.session_state.water_data['water_intake']
+                st.session_state.water_data['weekly_hist'].set(local_today(st.session_state.user_data['timezone']),
+                                                               st.session_state.water_data['water_intake'])
 
-                update_water_intake(st.session_state.id_user, st.session_state.water_data)
+                intake_buffer.add(st.session_state.id_user, user_amount, units)
+                user_cache.set_water_data(st.session_state.id_user, st.session_state.water_data)
 
                 st.success(f"Added {user_amount} ml! 💧")
 
@@ -0,0 +1,79 @@
+"""
+Weekly history for HydroLife
+A fixed ring of seven int32 slots keyed by date ordinal, plus the ordinal
+of the Monday it currently holds. A day's slot is found arithmetically and
+the slots are already in Mon-Sun order for charts. Rings live in memory
+only; load_user builds them from daily_totals.
+"""
+
+from array import array
+from datetime import date
+
+DAYS = 7
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+_EMPTY = array('i', [0]) * DAYS
+
+
+def _slot(ordinal):
+    # date.fromordinal(1) was a Monday, so this is also the weekday
+    return (ordinal - 1) % DAYS
+
+
+class WeekRing:
+    """Daily totals for the week starting on ``base`` (a Monday's ordinal).
+
+    Writing a day from a later week moves the ring onto that week and
+    clears the slots, since every one of them then belongs to an old week.
+    Days before the current week are ignored.
+    """
+
+    __slots__ = ('base', 'slots')
+
+    def __init__(self, base, slots=None):
+        self.base = base
+        self.slots = array('i', slots) if slots is not None else array('i', _EMPTY)
+
+    @classmethod
+    def for_day(cls, day):
+        """An empty ring for the week containing ``day``"""
+        ordinal = day.toordinal()
+        return cls(ordinal - _slot(ordinal))
+
+    @property
+    def monday(self):
+        return date.fromordinal(self.base)
+
+    def advance(self, day):
+        """Move onto ``day``'s week if it is later than the one held"""
+        ordinal = day.toordinal()
+        base = ordinal - _slot(ordinal)
+        if base > self.base:
+            self.base = base
+            self.slots[:] = _EMPTY
+        return self
+
+    def set(self, day, ml):
+        self.advance(day)
+        ordinal = day.toordinal()
+        if ordinal >= self.base:
+            self.slots[_slot(ordinal)] = ml
+
+    def get(self, day):
+        ordinal = day.toordinal()
+        if self.base <= ordinal < self.base + DAYS:
+            return self.slots[_slot(ordinal)]
+        return 0
+
+    def view(self):
+        """Read-only Mon-Sun view of the slots, without copying"""
+        return memoryview(self.slots).toreadonly()
+
+    def __eq__(self, other):
+        if not isinstance(other, WeekRing):
+            return NotImplemented
+        return self.base == other.base and self.slots == other.slots
+
+    def __repr__(self):
+        return f"WeekRing({self.monday}, {self.slots.tolist()})"
+